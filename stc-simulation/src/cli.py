@@ -0,0 +1,310 @@
+# Standard library imports
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+# Related third-party imports
+# pulp, jsonschema, numpy and tabulate are imported inside the subcommands that need them,
+# so `stc --help` or a plain simulation never pays for the solver or the schema validator.
+
+# Local application/library specific imports
+
+VERSION = "0.1.0"
+
+# Modules the bare entry point must never import (checked by `stc bench`)
+HEAVY_MODULES = ("pulp", "jsonschema", "numpy", "tabulate")
+
+
+def _emit(args, payload, lines):
+    """JSON for scripts, short text lines for people."""
+    if args.json:
+        print(json.dumps(payload, sort_keys=True), file=args.stdout)
+    else:
+        for line in lines:
+            print(line, file=args.stdout)
+
+
+def _find(items, key, value, label):
+    found = next((item for item in items if item[key] == value), None)
+    if found is None:
+        print(f"❌ ERROR: {label} '{value}' not found in data.")
+        sys.exit(1)
+    return found
+
+
+def _load_catalog(args):
+    from jsonschema.exceptions import ValidationError
+    from stc.loaders.catalog import load_catalog
+
+    try:
+        return load_catalog(args.environments, args.modules, args.missions, args.agents)
+    except ValidationError as e:
+        print(f"❌ SCHEMA ERROR: {e.message}")
+        sys.exit(1)
+
+
+# --- SUBCOMMANDS ---
+
+def cmd_validate(args):
+    catalog = _load_catalog(args)
+    counts = {key: len(items) for key, items in catalog.items()}
+    _emit(args, {"valid": True, **counts}, [" | ".join(f"{k.capitalize()}: {v}" for k, v in counts.items())])
+
+
+def cmd_plan(args):
+    from stc.constraints.operational_constraints import filter_compatible_modules
+    from stc.planning.solver import optimize_loadout
+
+    catalog = _load_catalog(args)
+    mission = _find(catalog['missions'], 'id', args.mission, "Mission")
+    env = _find(catalog['environments'], 'id', args.environment or mission['environment'], "Environment")
+
+    modules = [m for m in catalog['modules'] if m['name'] not in set(args.exclude)]
+    valid_modules, _ = filter_compatible_modules(modules, env, verbose=False)
+    loadout, n_hum, n_rob = optimize_loadout(valid_modules, env, mission, catalog['agents'])
+
+    payload = {"mission": mission['id'], "environment": env['id'], "feasible": bool(loadout),
+               "loadout": loadout, "n_hum": n_hum, "n_rob": n_rob}
+    if loadout:
+        lines = [f"{count} x {name}" for name, count in loadout.items()] + [f"{n_hum}x Humans", f"{n_rob}x Robots"]
+    else:
+        lines = ["❌ IMPOSSIBLE: No combination of modules can meet these goals."]
+    _emit(args, payload, lines)
+    if not loadout:
+        sys.exit(2)
+
+
+def cmd_simulate(args):
+    # Only the YAML loaders and the engine: no schema validation, no solver
+    from stc.loaders.environment_loader import open_environments
+    from stc.loaders.module_loader import open_modules
+    from stc.loaders.agent_loader import open_agents
+    from stc.simulation.engine import run_simulation
+    from stc.simulation.agents import build_population
+
+    env_data, _ = open_environments(args.environments)
+    _, _, module_profiles = open_modules(args.modules)
+    agt_data, _ = open_agents(args.agents)
+    env = _find(env_data['environments'], 'id', args.environment, "Environment")
+
+    loadout = json.loads(args.loadout)
+    sim_list = []
+    for name, count in loadout.items():
+        sim_list.extend([_find(module_profiles, 'name', name, "Module")] * int(count))
+
+    # Crews are charged the catalog upkeep per agent type, as the planner charges them
+    counts = {'human': args.n_hum, 'robot': args.n_rob, **json.loads(args.agent_counts or '{}')}
+    agents = build_population(agt_data['agents'], counts) if agt_data['agents'] else None
+
+    power_grid = json.loads(args.power_grid) if args.power_grid is not None else None
+    results = run_simulation(sim_list, env, counts['human'], counts['robot'], duration_hours=args.hours,
+                             agents=agents, power_grid=power_grid)
+
+    payload = {key: results.get(key) for key in ("success", "hour", "failure_reason", "resources", "power_grid",
+                                                  "agent_unsupplied")}
+    lines = ["✅ MISSION SUCCESSFUL" if results['success'] else f"❌ MISSION FAILED: {results['failure_reason']}"]
+    lines += [f"   > {res.capitalize()}: {val}" for res, val in results['resources'].items()]
+    if power_grid is not None:
+        lines += [f"   > Shed hours ({bus}): {hours}" for bus, hours in results['power_grid']['shed_hours'].items()]
+    _emit(args, payload, lines)
+    if not results['success']:
+        sys.exit(2)
+
+
+def cmd_sweep(args):
+    from stc.planning.cache import StageCache
+    from stc.planning.pipeline import evaluate_scenario
+
+    catalog = _load_catalog(args)
+    missions = [_find(catalog['missions'], 'id', m, "Mission") for m in args.mission] or catalog['missions']
+    envs = {e['id']: e for e in catalog['environments']}
+    cache = StageCache(cache_dir=args.cache_dir) if args.cache_dir else None
+    reliability = {"trials": args.trials} if args.trials else None
+
+    results = []
+    for mission in missions:
+        env = envs.get(args.environment or mission['environment'])
+        if env is None:
+            print(f"❌ ERROR: Environment '{args.environment or mission['environment']}' not found in data.")
+            sys.exit(1)
+        results.append(evaluate_scenario(catalog['modules'], env, mission, catalog['agents'], cache=cache,
+                                         reliability=reliability, early_stop=args.early_stop))
+
+    if args.store:
+        from stc.storage.result_store import open_store, record_results, catalog_version
+
+        conn = open_store(args.store)
+        record_results(conn, results, catalog_version=catalog_version(catalog))
+        conn.close()
+
+    keys = ("mission", "environment", "feasible", "success", "goals_met", "hour", "loadout", "n_hum", "n_rob",
+            "failure_reason")
+    payload = [{key: r.get(key) for key in keys} for r in results]
+    lines = [
+        f"{r['mission']:<30} | {r['environment']:<15} | "
+        + ("✅ MET" if r['success'] and r['goals_met'] else f"❌ {r.get('failure_reason') or 'Goals not met'}")
+        for r in results
+    ]
+    _emit(args, payload, lines)
+
+
+def cmd_impact(args):
+    from jsonschema.exceptions import ValidationError
+    from stc.loaders.catalog import load_catalog
+    from stc.planning.cache import StageCache
+    from stc.planning.impact_index import evaluate_impact, baseline_from_store
+
+    new = _load_catalog(args)
+    try:
+        old = load_catalog(args.old_environments or args.environments, args.old_modules or args.modules,
+                           args.old_missions or args.missions, args.old_agents or args.agents)
+    except ValidationError as e:
+        print(f"❌ SCHEMA ERROR: {e.message}")
+        sys.exit(1)
+
+    conn = baseline = None
+    if args.store:
+        from stc.storage.result_store import open_store, catalog_version
+
+        conn = open_store(args.store)
+        baseline = baseline_from_store(conn, catalog_version(old))
+    cache = StageCache(cache_dir=args.cache_dir) if args.cache_dir else None
+
+    report = evaluate_impact(old, new, baseline=baseline, cache=cache, conn=conn, early_stop=args.early_stop)
+    if conn is not None:
+        conn.close()
+
+    payload = {key: report[key] for key in ("affected", "skipped", "deltas")}
+    lines = [f"Re-evaluated {report['affected']} scenario(s), {report['skipped']} unaffected."]
+    for d in report['deltas']:
+        status = "CHANGED" if d['changed'] else "same"
+        lines.append(f"{d['mission']:<30} | {d['environment']:<15} | {status} | {'; '.join(d['reasons'])}")
+        lines += [f"   > {name}: {a} -> {b}" for name, (a, b) in d['loadout'].items()]
+        lines += [f"   > {key}: {d[key][0]} -> {d[key][1]}"
+                  for key in ("feasible", "success", "goals_met", "n_hum", "n_rob") if d[key][0] != d[key][1]]
+    _emit(args, payload, lines)
+
+
+def cmd_bench(args):
+    """Times cold starts of this entry point in fresh interpreters and checks the lazy-import budget."""
+    import statistics
+    import subprocess
+
+    command = [sys.executable, "-m", "stc.cli"] + (args.run or ["--version"])
+
+    def timed(cmd):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return time.perf_counter() - start
+
+    baseline = statistics.median(timed([sys.executable, "-c", "pass"]) for _ in range(args.repeat))
+    samples = [timed(command) for _ in range(args.repeat)]
+    median = statistics.median(samples)
+
+    # Which heavy dependencies a bare `import stc.cli` drags in (should be none)
+    probe = subprocess.run(
+        [sys.executable, "-c",
+         f"import sys, stc.cli; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+        capture_output=True, text=True,
+    )
+    leaked = [m for m in probe.stdout.strip().split(",") if m]
+
+    payload = {
+        "command": command[3:], "repeat": args.repeat,
+        "median_ms": round(1000 * median, 2), "min_ms": round(1000 * min(samples), 2),
+        "interpreter_ms": round(1000 * baseline, 2), "overhead_ms": round(1000 * (median - baseline), 2),
+        "heavy_imports": leaked, "budget_ms": args.startup_budget,
+    }
+    lines = [
+        f"stc {' '.join(command[3:])}: median {payload['median_ms']} ms, min {payload['min_ms']} ms "
+        f"({payload['overhead_ms']} ms over a bare interpreter, {args.repeat} runs)",
+        f"Heavy modules on import: {', '.join(leaked) if leaked else 'none'}",
+    ]
+
+    over_budget = args.startup_budget is not None and 1000 * median > args.startup_budget
+    if over_budget:
+        lines.append(f"❌ Startup budget exceeded: {payload['median_ms']} ms > {args.startup_budget} ms")
+    _emit(args, payload, lines)
+    if over_budget or leaked:
+        sys.exit(1)
+
+
+# --- ENTRY POINT ---
+
+def build_parser():
+    # Default data paths are spelled out here rather than imported from the loaders,
+    # so building the parser never imports anything
+    parser = argparse.ArgumentParser(prog="stc", description="STC simulation tools.")
+    parser.add_argument("--version", action="version", version=f"stc {VERSION}")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output.")
+    parser.add_argument("--environments", default="data/all_environments.yaml", help="File or shard directory.")
+    parser.add_argument("--modules", default="data/all_modules.yaml", help="File or shard directory.")
+    parser.add_argument("--missions", default="data/all_mission_profiles.yaml", help="File or shard directory.")
+    parser.add_argument("--agents", default="data/all_agents.yaml", help="File or shard directory.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_validate = sub.add_parser("validate", help="Load and schema-check the catalogs.")
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_plan = sub.add_parser("plan", help="Solve the cheapest loadout for a mission.")
+    p_plan.add_argument("mission")
+    p_plan.add_argument("--environment", default=None, help="Override the mission's environment.")
+    p_plan.add_argument("--exclude", nargs="*", default=[], help="Module names to leave out.")
+    p_plan.set_defaults(func=cmd_plan)
+
+    p_simulate = sub.add_parser("simulate", help="Run the hourly simulation for a given loadout.")
+    p_simulate.add_argument("environment")
+    p_simulate.add_argument("loadout", help='Module counts as JSON, e.g. \'{"Solar_Array": 3}\'.')
+    p_simulate.add_argument("--n-hum", type=int, default=0)
+    p_simulate.add_argument("--n-rob", type=int, default=0)
+    p_simulate.add_argument("--hours", type=int, default=24)
+    p_simulate.add_argument("--agent-counts", default=None,
+                            help='Counts for other agent types as JSON, e.g. \'{"rover": 2}\'.')
+    p_simulate.add_argument("--power-grid", default=None,
+                            help='Per-bus power network as JSON (\'{}\' = pressurized/exterior default).')
+    p_simulate.set_defaults(func=cmd_simulate)
+
+    p_sweep = sub.add_parser("sweep", help="Plan, simulate and score every mission.")
+    p_sweep.add_argument("--mission", action="append", default=[], help="Limit to these missions (repeatable).")
+    p_sweep.add_argument("--environment", default=None, help="Run every mission in this environment.")
+    p_sweep.add_argument("--early-stop", action="store_true", help="Stop runs once a goal is unreachable.")
+    p_sweep.add_argument("--trials", type=int, default=0, help="Monte Carlo trials per mission (0 = off).")
+    p_sweep.add_argument("--cache-dir", default=None, help="Memoize filter/optimize/simulate results here.")
+    p_sweep.add_argument("--store", default=None, help="Record results in this SQLite result store.")
+    p_sweep.set_defaults(func=cmd_sweep)
+
+    p_impact = sub.add_parser("impact", help="Re-evaluate only the missions a catalog edit affects.")
+    p_impact.add_argument("--old-modules", default=None, help="Catalog before the edit (default: --modules).")
+    p_impact.add_argument("--old-environments", default=None)
+    p_impact.add_argument("--old-missions", default=None)
+    p_impact.add_argument("--old-agents", default=None)
+    p_impact.add_argument("--early-stop", action="store_true", help="Stop runs once a goal is unreachable.")
+    p_impact.add_argument("--cache-dir", default=None, help="Memoize filter/optimize/simulate results here.")
+    p_impact.add_argument("--store", default=None, help="Baseline runs from, and new runs into, this result store.")
+    p_impact.set_defaults(func=cmd_impact)
+
+    p_bench = sub.add_parser("bench", help="Measure CLI startup time against a budget.")
+    p_bench.add_argument("--repeat", type=int, default=20)
+    p_bench.add_argument("--startup-budget", type=float, default=None, help="Fail if the median exceeds this (ms).")
+    p_bench.add_argument("run", nargs=argparse.REMAINDER, help="Subcommand to time (default: --version).")
+    p_bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.stdout = sys.stdout
+
+    # With --json the loaders' progress messages go to stderr so stdout stays parseable
+    if args.json:
+        with contextlib.redirect_stdout(sys.stderr):
+            args.func(args)
+    else:
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Standard library imports
+
+# Related third-party imports
+import pulp
+
+# Local application/library specific imports
+
+# Agent name -> historical variable name in the loadout model
+NAMED_AGENT_VARS = {'human': 'n_colonists', 'robot': 'n_robots'}
+AGENT_VAR_PREFIX = "n_agent_"
+
+
+def agent_rate(agent: dict, resource_name: str) -> float:
+    """
+    Net output of one agent for a resource: outputs minus inputs.
+    Consumables are per hour; 'labour' is labour points per day, like module labour demand.
+    """
+    return agent.get('outputs', {}).get(resource_name, 0) - agent.get('inputs', {}).get(resource_name, 0)
+
+
+def agent_variables(valid_agents, colonists, robots) -> dict:
+    """
+    One integer count per agent type. Humans and robots keep their existing variables,
+    every other type in the catalog gets its own.
+    """
+    agent_vars = {}
+    for a in valid_agents:
+        if a['name'] == 'human':
+            agent_vars['human'] = colonists
+        elif a['name'] == 'robot':
+            agent_vars['robot'] = robots
+        else:
+            agent_vars[a['name']] = pulp.LpVariable(f"{AGENT_VAR_PREFIX}{a['name']}", lowBound=0, cat='Integer')
+    return agent_vars
+
+
+def agent_flow(valid_agents, agent_vars, resource_name):
+    """Aggregated net flow of the whole population: sum over types of count * rate."""
+    return pulp.lpSum([agent_vars[a['name']] * agent_rate(a, resource_name)
+                       for a in valid_agents if a['name'] in agent_vars])
@@ -1,11 +1,13 @@
 import pulp
 import math
 
-def add_labor_constraint(prob, valid_modules, vars, colonists, robots):
+from stc.constraints.agent_constraints import agent_flow
+
+def add_labor_constraint(prob, valid_modules, vars, valid_agents, agent_vars):
     """
     vars: The dictionary of module variables { 'Solar_Panel': LpVariable, ... }
-    colonists: The PuLP variable for number of humans
-    robots: The PuLP variable for number of robots
+    valid_agents: Agent definitions, their 'labour' output is labour points per day
+    agent_vars: The PuLP count variable per agent type (see agent_variables)
     """
 
     mass_index = {
@@ -44,7 +46,7 @@ def add_labor_constraint(prob, valid_modules, vars, colonists, robots):
 
     # 4. Finalize the bucket
     total_demand = pulp.lpSum(labor_terms)
-    total_supply = (colonists * 8) + (robots * 24)
+    total_supply = agent_flow(valid_agents, agent_vars, 'labour')
     
     prob += total_supply >= total_demand, "Advanced_Labor_Constraint"
     
@@ -1,6 +1,6 @@
 
 
-def filter_compatible_modules(module_input, env_data: dict) -> tuple[list, dict]:
+def filter_compatible_modules(module_input, env_data: dict, verbose: bool = True) -> tuple[list, dict]:
     # SAFETY CHECK: If the user passed the dict containing "modules", extract the list
     if isinstance(module_input, dict) and 'modules' in module_input:
         module_list = module_input['modules']
@@ -58,6 +58,14 @@ def filter_compatible_modules(module_input, env_data: dict) -> tuple[list, dict]
         else:
             report[name] = errors
 
+    # Batch callers (workers, sweeps) pass verbose=False to keep their output clean
+    if verbose:
+        print_filter_report(valid_modules, report)
+
+    return valid_modules, report
+
+
+def print_filter_report(valid_modules: list, report: dict):
     print(f"{len(valid_modules)} modules passed physics checks:\n")
 
     for m in valid_modules:
@@ -66,7 +74,4 @@ def filter_compatible_modules(module_input, env_data: dict) -> tuple[list, dict]
     print(f"\n{len(report)} modules failed physics checks for x reason:\n")
 
     for i, m in report.items():
-        print(f"{i}: {m[0]}")
-        
-
-    return valid_modules, report
\ No newline at end of file
+        print(f"{i}: {m[0]}")
\ No newline at end of file
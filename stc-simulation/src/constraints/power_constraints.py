@@ -5,7 +5,7 @@ import pulp
 
 # Local application/library specific imports
 
-def add_power_constraint(valid_modules, agents, reqs, prob, vars):
+def add_power_constraint(valid_modules, agents, reqs, prob, vars, agent_vars=None):
 
     # Steady mods provide power regardless of time (RTGs, Sabatier if it generates power, etc)
     steady_mods = [m for m in valid_modules if "Solar_Array" not in m['name'] and "Battery" not in m['name'] and m['outputs'].get('power', 0) > 0]
@@ -25,6 +25,11 @@ def add_power_constraint(valid_modules, agents, reqs, prob, vars):
 
     crew_power_per_hour = sum([a.get('inputs', {}).get('power', 0) * a.get('count', 0) for a in agents])
 
+    # Agents the solver is choosing (robots draw power around the clock)
+    if agent_vars:
+        crew_power_per_hour += pulp.lpSum([agent_vars[a['name']] * a.get('inputs', {}).get('power', 0)
+                                           for a in agents if a['name'] in agent_vars])
+
     # Survival Constraint: Available Night Power >= Hourly Drain
     # (We simplify here: Battery Capacity must cover the drain)
     prob += night_power_available >= (base_load_hourly + crew_power_per_hour), "Nighttime_Power_Balance"
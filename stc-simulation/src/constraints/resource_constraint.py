@@ -1,17 +1,18 @@
 import pulp
 
-def add_resource_constraint(prob, resource_name, valid_modules, vars, initial, reqs, duration, valid_agents, colonists, robots):
+from stc.constraints.agent_constraints import agent_flow
+
+def add_resource_constraint(prob, resource_name, valid_modules, vars, initial, reqs, duration, valid_agents, agent_vars,
+                            transfers=0, solar_factor=1.0):
     """
     Handles the 72-hour total resource accumulation.
+    agent_vars: {agent name: count variable} for every agent type (see agent_variables).
+    transfers: net amount received from other sites over the mission (planning.network_solver).
+    solar_factor: mean solar output multiplier over the mission (simulation.forcing).
     """
 
-    c_info = next((a for a in valid_agents if a['name'] == 'human'), {})
-    r_info = next((a for a in valid_agents if a['name'] == 'robotic'), {})
-    
-    c_drain = c_info.get('inputs', {}).get(resource_name, 0)
-    r_drain = r_info.get('inputs', {}).get(resource_name, 0)
-
-    total_agent_upkeep = (colonists * c_drain * duration) + (robots * r_drain * duration)
+    # Hourly upkeep of the whole population, net of what agents produce (e.g. human waste)
+    total_agent_upkeep = -agent_flow(valid_agents, agent_vars, resource_name) * duration
 
     
     try:
@@ -21,8 +22,9 @@ def add_resource_constraint(prob, resource_name, valid_modules, vars, initial, r
         None
 
     net_flow = []
-    # Integration of sin(x) over 24h gives an average output of ~31.8%
-    SOLAR_CAPACITY_FACTOR = 1 
+    # Same forcing profile as the engine: ~31.8% of rated output over an Earth-like day at 1 AU,
+    # scaled by the environment's solar flux and day length
+    SOLAR_CAPACITY_FACTOR = solar_factor
 
     for m in valid_modules:
         out_val = m.get('outputs', {}).get(resource_name, 0)
@@ -36,5 +38,5 @@ def add_resource_constraint(prob, resource_name, valid_modules, vars, initial, r
         net_contribution = vars[m['name']] * (effective_out - in_val) * duration
         net_flow.append(net_contribution)
     
-    total_available = initial.get(resource_name, 0) + pulp.lpSum(net_flow) - total_agent_upkeep
+    total_available = initial.get(resource_name, 0) + pulp.lpSum(net_flow) - total_agent_upkeep + transfers
     prob += total_available >= target, f"Sustain_{resource_name.capitalize()}"
\ No newline at end of file
@@ -0,0 +1,228 @@
+# Standard library imports
+import json
+import os
+import socket
+import sqlite3
+import time
+
+# Related third-party imports
+
+# Local application/library specific imports
+
+# A job stays leased for this long unless its worker heartbeats
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+# A failed job waits this long before its first retry, doubling per attempt up to the cap
+RETRY_BACKOFF_SECONDS = 5.0
+MAX_BACKOFF_DOUBLINGS = 6
+# How long a connection waits on another process's write lock before giving up
+BUSY_TIMEOUT_MS = 30000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    not_before REAL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch, status);
+"""
+
+
+def default_worker_id() -> str:
+    """host:pid, unique across the machines sharing the queue file."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def open_queue(db_path, wal=False) -> sqlite3.Connection:
+    """
+    Opens (and creates if needed) the queue database.
+    Every producer and worker process opens its own connection.
+    wal: WAL lets readers run while a worker holds the write lock, but its shared-memory
+    index only works when every process is on the same host. The default rollback journal
+    is safe on a network filesystem shared between hosts.
+    """
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+
+    try:
+        conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+    except sqlite3.OperationalError:
+        pass # Another connection holds the file open; keep its journal mode
+    if wal:
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def enqueue_jobs(conn, payloads, batch="default", max_attempts=DEFAULT_MAX_ATTEMPTS) -> int:
+    """Adds every payload (any JSON-serialisable dict) in a single transaction. Returns the count."""
+    now = time.time()
+    rows = [(batch, json.dumps(p), max_attempts, now) for p in payloads]
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT INTO jobs (batch, payload, max_attempts, enqueued_at) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(rows)
+
+
+def enqueue_scenarios(conn, module_input, environments, missions, agents, batch="default", max_attempts=DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    Producer helper: one job per mission, paired with the environment it names.
+    The full scenario travels with the job so workers never need the data folder.
+    """
+    env_map = {e['id']: e for e in environments}
+    payloads = []
+
+    for mission in missions:
+        environment = env_map.get(mission['environment'])
+        if environment is None:
+            print(f"Skipping {mission['id']}: environment '{mission['environment']}' not found.")
+            continue
+
+        payloads.append({
+            "modules": module_input,
+            "environment": environment,
+            "mission": mission,
+            "agents": agents,
+        })
+
+    return enqueue_jobs(conn, payloads, batch=batch, max_attempts=max_attempts)
+
+
+def _reclaim_expired(conn, now):
+    """Leases whose worker stopped heartbeating go back to the queue (or fail out)."""
+    conn.execute(
+        "UPDATE jobs SET status = 'failed', worker = NULL, lease_expires = NULL, finished_at = ?, "
+        "error = COALESCE(error, 'lease expired') "
+        "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+        (now, now),
+    )
+    conn.execute(
+        "UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL "
+        "WHERE status = 'leased' AND lease_expires < ?",
+        (now,),
+    )
+
+
+def lease_jobs(conn, worker_id, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS) -> list[dict]:
+    """
+    Atomically claims up to `limit` queued jobs for `worker_id`, skipping jobs still
+    waiting out a retry backoff.
+    Returns [{'id', 'payload', 'attempts'}, ...]; empty when nothing is ready.
+    """
+    now = time.time()
+
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers can never claim the same row
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _reclaim_expired(conn, now)
+
+        rows = conn.execute(
+            "SELECT id, payload, attempts FROM jobs WHERE status = 'queued' "
+            "AND (not_before IS NULL OR not_before <= ?) ORDER BY id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+
+        conn.executemany(
+            "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+            "attempts = attempts + 1, started_at = ? WHERE id = ?",
+            [(worker_id, now + lease_seconds, now, r['id']) for r in rows],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return [{"id": r['id'], "payload": json.loads(r['payload']), "attempts": r['attempts'] + 1} for r in rows]
+
+
+def heartbeat(conn, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS) -> bool:
+    """Extends a lease. Returns False if the job was reclaimed from this worker in the meantime."""
+    cur = conn.execute(
+        "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+        (time.time() + lease_seconds, job_id, worker_id),
+    )
+    return cur.rowcount == 1
+
+
+def complete_job(conn, job_id, worker_id, result) -> bool:
+    """Stores the result. Ignored (returns False) if the lease was lost to another worker."""
+    cur = conn.execute(
+        "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, finished_at = ? "
+        "WHERE id = ? AND worker = ? AND status = 'leased'",
+        (json.dumps(result), time.time(), job_id, worker_id),
+    )
+    return cur.rowcount == 1
+
+
+def fail_job(conn, job_id, worker_id, error, backoff_seconds=RETRY_BACKOFF_SECONDS) -> bool:
+    """
+    Records an error; the job is retried until it runs out of attempts.
+    Each retry waits backoff_seconds * 2^(attempts - 1), so a job that fails on a bad
+    input or a busy host does not spin through its attempts at once.
+    """
+    now = time.time()
+    cur = conn.execute(
+        "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+        "error = ?, worker = NULL, lease_expires = NULL, "
+        "not_before = ? + ? * (1 << MIN(MAX(attempts - 1, 0), ?)), "
+        "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END "
+        "WHERE id = ? AND worker = ? AND status = 'leased'",
+        (str(error), now, backoff_seconds, MAX_BACKOFF_DOUBLINGS, now, job_id, worker_id),
+    )
+    return cur.rowcount == 1
+
+
+def queue_stats(conn, window_seconds=60.0, batch=None) -> dict:
+    """Queue depth per status plus the completion rate over the last `window_seconds`."""
+    where, params = ("WHERE batch = ?", (batch,)) if batch else ("", ())
+
+    counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+    for row in conn.execute(f"SELECT status, COUNT(*) AS n FROM jobs {where} GROUP BY status", params):
+        counts[row['status']] = row['n']
+
+    since = time.time() - window_seconds
+    recent_where = "WHERE status = 'done' AND finished_at >= ?" + (" AND batch = ?" if batch else "")
+    recent = conn.execute(f"SELECT COUNT(*) FROM jobs {recent_where}", (since, *params)).fetchone()[0]
+
+    return {
+        **counts,
+        "depth": counts['queued'] + counts['leased'],
+        "throughput_per_min": round(recent * 60.0 / window_seconds, 2),
+    }
+
+
+def fetch_results(conn, batch=None) -> list[dict]:
+    """All finished jobs with their decoded results, in enqueue order."""
+    where, params = ("AND batch = ?", (batch,)) if batch else ("", ())
+    rows = conn.execute(
+        f"SELECT id, batch, status, result, error FROM jobs WHERE status IN ('done', 'failed') {where} ORDER BY id",
+        params,
+    ).fetchall()
+    return [
+        {
+            "id": r['id'], "batch": r['batch'], "status": r['status'],
+            "result": json.loads(r['result']) if r['result'] else None, "error": r['error'],
+        }
+        for r in rows
+    ]
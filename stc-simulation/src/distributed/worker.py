@@ -0,0 +1,184 @@
+# Standard library imports
+import argparse
+import multiprocessing
+import threading
+import time
+import traceback
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.distributed.job_queue import (
+    DEFAULT_LEASE_SECONDS, default_worker_id, open_queue, enqueue_scenarios,
+    lease_jobs, heartbeat, complete_job, fail_job, queue_stats, fetch_results,
+)
+
+
+def _heartbeat_loop(db_path, job_id, worker_id, lease_seconds, stop, wal=False):
+    """Keeps the lease alive while a long CBC solve or simulation is running."""
+    conn = open_queue(db_path, wal=wal)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not heartbeat(conn, job_id, worker_id, lease_seconds):
+                break # Lease was reclaimed, the result will be discarded on completion
+    finally:
+        conn.close()
+
+
+def run_job(payload: dict, cache=None) -> dict:
+    """Evaluates one scenario payload as produced by enqueue_scenarios."""
+    # Imported here so queue-only commands (enqueue, status) do not pay for pulp
+    from stc.planning.pipeline import evaluate_scenario
+
+    return evaluate_scenario(payload['modules'], payload['environment'], payload['mission'], payload['agents'], cache=cache)
+
+
+def run_worker(db_path, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, batch_size=1,
+               idle_exit=True, poll_seconds=2.0, report_every=30.0, cache_dir=None, wal=False) -> int:
+    """
+    Drains the queue until it is empty (or forever with idle_exit=False).
+    Jobs waiting out a retry backoff keep the worker polling.
+    cache_dir: optional stage cache directory, shareable between workers on one host.
+    wal: open the queue in WAL mode (every worker on one host only).
+    Returns the number of jobs this worker completed.
+    """
+    worker_id = worker_id or default_worker_id()
+    cache = None
+    if cache_dir:
+        from stc.planning.cache import StageCache
+        cache = StageCache(cache_dir=cache_dir)
+    conn = open_queue(db_path, wal=wal)
+    completed = 0
+    started = time.time()
+    last_report = started
+
+    try:
+        while True:
+            jobs = lease_jobs(conn, worker_id, limit=batch_size, lease_seconds=lease_seconds)
+
+            if not jobs:
+                if idle_exit and queue_stats(conn)['depth'] == 0:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            for job in jobs:
+                stop = threading.Event()
+                beat = threading.Thread(
+                    target=_heartbeat_loop, args=(db_path, job['id'], worker_id, lease_seconds, stop, wal),
+                    daemon=True,
+                )
+                beat.start()
+
+                try:
+                    result = run_job(job['payload'], cache=cache)
+                    if complete_job(conn, job['id'], worker_id, result):
+                        completed += 1
+                except Exception as e:
+                    fail_job(conn, job['id'], worker_id, f"{e}\n{traceback.format_exc()}")
+                finally:
+                    stop.set()
+                    beat.join()
+
+            now = time.time()
+            if now - last_report >= report_every:
+                stats = queue_stats(conn)
+                rate = completed * 60.0 / (now - started)
+                print(f"[{worker_id}] done {completed} ({rate:.1f}/min) | queue depth {stats['depth']} | "
+                      f"cluster {stats['throughput_per_min']}/min")
+                last_report = now
+    finally:
+        conn.close()
+
+    elapsed = time.time() - started
+    print(f"[{worker_id}] finished: {completed} jobs in {elapsed:.1f}s")
+    return completed
+
+
+def _worker_process(db_path, lease_seconds, batch_size, idle_exit, cache_dir, wal):
+    run_worker(db_path, lease_seconds=lease_seconds, batch_size=batch_size, idle_exit=idle_exit, cache_dir=cache_dir,
+               wal=wal)
+
+
+def enqueue_catalog(db_path, batch="default", wal=False) -> int:
+    """Loads and validates the data folder, then queues every mission."""
+    from stc.loaders.catalog import load_catalog
+
+    catalog = load_catalog()
+
+    conn = open_queue(db_path, wal=wal)
+    try:
+        return enqueue_scenarios(conn, catalog['modules'], catalog['environments'], catalog['missions'],
+                                 catalog['agents'], batch=batch)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="STC scenario job queue (SQLite, no broker).")
+    parser.add_argument("--db", default="stc_queue.sqlite", help="Queue database on a shared filesystem.")
+    parser.add_argument("--wal", action="store_true",
+                        help="Use WAL journaling (faster, but only when every worker runs on this host).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Queue every mission in the data folder.")
+    p_enqueue.add_argument("--batch", default="default")
+
+    p_work = sub.add_parser("work", help="Drain the queue with one or more local worker processes.")
+    p_work.add_argument("--processes", type=int, default=1)
+    p_work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS)
+    p_work.add_argument("--batch-size", type=int, default=1)
+    p_work.add_argument("--forever", action="store_true", help="Keep polling after the queue drains.")
+    p_work.add_argument("--cache-dir", default=None, help="Memoize filter/optimize/simulate results here.")
+
+    sub.add_parser("status", help="Print queue depth and throughput.")
+
+    p_export = sub.add_parser("export", help="Copy finished results into a SQLite result store.")
+    p_export.add_argument("--store", required=True)
+    p_export.add_argument("--batch", default=None)
+    p_export.add_argument("--catalog-version", default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "enqueue":
+        count = enqueue_catalog(args.db, batch=args.batch, wal=args.wal)
+        print(f"Queued {count} scenarios in batch '{args.batch}'.")
+
+    elif args.command == "work":
+        if args.processes <= 1:
+            run_worker(args.db, lease_seconds=args.lease, batch_size=args.batch_size, idle_exit=not args.forever,
+                       cache_dir=args.cache_dir, wal=args.wal)
+        else:
+            procs = [
+                multiprocessing.Process(
+                    target=_worker_process,
+                    args=(args.db, args.lease, args.batch_size, not args.forever, args.cache_dir, args.wal),
+                )
+                for _ in range(args.processes)
+            ]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+
+    elif args.command == "status":
+        conn = open_queue(args.db, wal=args.wal)
+        stats = queue_stats(conn)
+        conn.close()
+        print(" | ".join(f"{k}: {v}" for k, v in stats.items()))
+
+    elif args.command == "export":
+        from stc.storage.result_store import open_store, record_results
+
+        conn = open_queue(args.db, wal=args.wal)
+        results = [r['result'] for r in fetch_results(conn, batch=args.batch) if r['status'] == 'done']
+        conn.close()
+
+        store = open_store(args.store, wal=args.wal)
+        count = record_results(store, results, catalog_version=args.catalog_version)
+        store.close()
+        print(f"Stored {count} results in {args.store}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Standard library imports
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.loaders.environment_loader import open_environments, ENV_DATA
+from stc.loaders.module_loader import open_modules, MOD_DATA
+from stc.loaders.mission_loader import open_missions, MIS_DATA
+from stc.loaders.agent_loader import open_agents, AGT_DATA
+from stc.loaders.shard_loader import resolve_data_path
+
+from stc.validators.environment_validator import validate_environment_file
+from stc.validators.module_validator import validate_module_file
+from stc.validators.mission_validator import validate_mission_file
+from stc.validators.agent_validator import validate_agent_file
+
+DATA_FILES = [resolve_data_path(p) for p in (ENV_DATA, MOD_DATA, MIS_DATA, AGT_DATA)]
+
+
+def load_catalog(env_path=ENV_DATA, mod_path=MOD_DATA, mis_path=MIS_DATA, agt_path=AGT_DATA) -> dict:
+    """
+    Phase 1 & 2 of the CLI in one call: loads all four catalogs and validates them.
+    Each path may be a single YAML file or a directory of shards.
+    Raises ValidationError on schema problems (the loaders exit() on missing files).
+    """
+    env_data, env_schema = open_environments(env_path)
+    mod_data, mod_schema, module_profiles = open_modules(mod_path)
+    mis_data, mis_schema, mission_profiles = open_missions(mis_path)
+    agt_data, agt_schema = open_agents(agt_path)
+
+    validate_environment_file(env_data, env_schema)
+    validate_module_file(mod_data, mod_schema)
+    validate_mission_file(mis_data, mis_schema)
+    validate_agent_file(agt_data, agt_schema)
+
+    return {
+        "environments": env_data['environments'],
+        "modules": module_profiles,
+        "missions": mission_profiles,
+        "agents": agt_data['agents'],
+    }
@@ -1,9 +1,10 @@
 # C:\Projects\stc\stc-core\constraints\validator.py
 import json
-import yaml
 import os
 from pathlib import Path
 
+from stc.loaders.shard_loader import load_catalog_source
+
 # 1. Get the directory where THIS script is located
 current_dir = Path(__file__).resolve().parent
 
@@ -27,15 +28,6 @@ def load_json_file(path):
             print(f"Error: Failed to load JSON. Details: {e}")
             exit()
 
-def load_yaml_file(path):
-    with open(path, 'r') as file:
-        try:
-            data = yaml.safe_load(file)
-            return data
-        except yaml.YAMLError as e:
-            print(f"Error: Failed to load YAML. Details: {e}")
-            exit()
-
 def get_combined_schema(list_schema_path, single_schema_path):
     """Links the single item schema into the list schema."""
     list_schema = load_json_file(list_schema_path)
@@ -45,12 +37,13 @@ def get_combined_schema(list_schema_path, single_schema_path):
     list_schema['properties'][root_key]['items'] = single_schema
     return list_schema
 
-def open_environments():
+def open_environments(path=ENV_DATA):
+    """path: a single YAML file or a directory of shards, relative to the project folder."""
     
     try:
         # Load data
         env_schema = get_combined_schema(S_ENV_LIST, S_ENV_SING)
-        env_data = load_yaml_file(ENV_DATA)
+        env_data = load_catalog_source(path, 'environments', 'id')
 
         environment_profiles = env_data['environments']
         print(f"Successfully loaded {len(environment_profiles)} environments.")
@@ -1,9 +1,10 @@
 # C:\Projects\stc\stc-core\constraints\validator.py
 import json
-import yaml
 import os
 from pathlib import Path
 
+from stc.loaders.shard_loader import load_catalog_source
+
 # 1. Get the directory where THIS script is located
 current_dir = Path(__file__).resolve().parent
 
@@ -27,16 +28,6 @@ def load_json_file(path):
             print(f"Error: Failed to load JSON. Details: {e}")
             exit()
 
-def load_yaml_file(path):
-    with open(path, 'r') as file:
-        try:
-            data = yaml.safe_load(file)
-            return data
-        except yaml.YAMLError as e:
-            print(f"Error: Failed to load YAML. Details: {e}")
-            exit()
-        
-
 def get_combined_schema(list_schema_path, single_schema_path):
     try:
         """Links the single item schema into the list schema."""
@@ -51,11 +42,12 @@ def get_combined_schema(list_schema_path, single_schema_path):
         print(f"Error: Failed to find root key. Details: {e}") 
         exit()
 
-def open_missions():
+def open_missions(path=MIS_DATA):
+    """path: a single YAML file or a directory of shards, relative to the project folder."""
     try:
         # Load data
         mis_schema = get_combined_schema(S_MIS_LIST, S_MIS_SING)
-        mis_data = load_yaml_file(MIS_DATA)
+        mis_data = load_catalog_source(path, 'missions', 'id')
 
         # Now this will work because the root key is 'missions'
         mission_profiles = mis_data['missions']
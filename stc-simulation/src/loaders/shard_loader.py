@@ -0,0 +1,143 @@
+# Standard library imports
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Related third-party imports
+import yaml
+
+# Local application/library specific imports
+
+# stc-simulation/, so data paths work from any working directory
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+# libyaml's C parser when PyYAML was built with it, otherwise the pure-Python one
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Below this much YAML the process pool costs more than it saves
+PARALLEL_MIN_BYTES = 1024 * 1024
+
+SHARD_SUFFIXES = ('.yaml', '.yml')
+
+
+def resolve_data_path(path) -> Path:
+    """Relative data paths are taken from the project folder, not the current directory."""
+    path = Path(path)
+    return path if path.is_absolute() else PROJECT_DIR / path
+
+
+def shard_paths(path) -> list[Path]:
+    """The file itself, or every YAML file under a shard directory in a stable order."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.rglob('*') if p.suffix in SHARD_SUFFIXES and p.is_file())
+    return [path]
+
+
+def source_mtime(path) -> float:
+    """
+    Latest modification time of a catalog file, or of any shard or folder in a directory.
+    Folders count because deleting or renaming a shard only touches the folder holding it.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0.0
+    times = [path.stat().st_mtime] + [p.stat().st_mtime for p in shard_paths(path) if p != path]
+    if path.is_dir():
+        times += [p.stat().st_mtime for p in path.rglob('*') if p.is_dir()]
+    return max(times)
+
+
+def parse_shard(path):
+    """Worker side: returns (path, data, error) instead of exiting, so the parent can report."""
+    try:
+        # Binary, so the YAML reader detects the encoding and reports bad bytes with a position
+        with open(path, 'rb') as file:
+            return str(path), yaml.load(file, Loader=YamlLoader), None
+    except (yaml.YAMLError, UnicodeDecodeError, OSError) as e:
+        return str(path), None, f"{type(e).__name__}: {e}"
+
+
+def _shard_items(data, root_key, key_field):
+    """A shard may hold the full `{root_key: [...]}` layout, a bare list, or one item."""
+    if data is None:
+        return []
+    if isinstance(data, dict) and root_key in data:
+        items = data[root_key] or []
+        if not isinstance(items, list):
+            raise ValueError(f"'{root_key}:' holds a {type(items).__name__}, expected a list")
+        return items
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and key_field in data:
+        return [data]
+    raise ValueError(f"expected '{root_key}:' list or a single entry with '{key_field}'")
+
+
+def load_catalog_source(path, root_key, key_field, workers=None) -> dict:
+    """
+    Loads one catalog (modules, missions, ...) from a single YAML file or a directory of shards.
+    Shards are parsed in parallel worker processes and merged in path order.
+    Duplicate `key_field` values across the catalog are an error.
+    Returns {root_key: [...]} like the single-file format.
+    """
+    path = resolve_data_path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No catalog at {path}")
+
+    paths = shard_paths(path)
+
+    # 1. Parse, in parallel for large shard sets when there are cores to spare
+    workers = workers or min(os.cpu_count() or 1, 8)
+    total_bytes = sum(p.stat().st_size for p in paths) if len(paths) > 1 else 0
+    if workers > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(parse_shard, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    else:
+        parsed = [parse_shard(p) for p in paths]
+
+    errors = [f"{p}: {err}" for p, _, err in parsed if err]
+    if errors:
+        print(f"Error: Failed to load YAML. Details: {errors[0]}")
+        exit()
+
+    # 2. Merge, remembering where each entry came from
+    items = []
+    seen = {}
+    malformed = []
+    duplicates = []
+    for shard_path, data, _ in parsed:
+        try:
+            shard_items = _shard_items(data, root_key, key_field)
+        except ValueError as e:
+            print(f"Error: Unexpected layout in {shard_path}. Details: {e}")
+            exit()
+
+        for position, item in enumerate(shard_items, start=1):
+            if not isinstance(item, dict):
+                malformed.append(f"entry {position} in {shard_path} is a {type(item).__name__}, not a mapping")
+                continue
+            if item.get(key_field) is None:
+                malformed.append(f"entry {position} in {shard_path} has no '{key_field}'")
+                continue
+
+            key = item[key_field]
+            if key in seen:
+                duplicates.append(f"'{key}' in {shard_path} (first defined in {seen[key]})")
+                continue
+            seen[key] = shard_path
+            items.append(item)
+
+    # 3. Entries without a key, and duplicate names that would silently shadow each other downstream
+    if malformed:
+        print(f"Error: Malformed {root_key} entries found:")
+        for m in malformed:
+            print(f"   - {m}")
+        exit()
+    if duplicates:
+        print(f"Error: Duplicate {root_key} {key_field}s found:")
+        for d in duplicates:
+            print(f"   - {d}")
+        exit()
+
+    return {root_key: items}
@@ -0,0 +1,218 @@
+# Standard library imports
+import copy
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.planning.solver import optimize_loadout
+from stc.simulation.engine import run_simulation
+from stc.storage.hashing import canonical_hash
+
+# Bump when the key or entry format changes
+CACHE_VERSION = 1
+
+# Packages whose code decides what the cached stages return; any edit to them
+# changes model_version() and so retires every entry written before it
+MODEL_PACKAGES = ('constraints', 'planning', 'simulation')
+
+
+@lru_cache(maxsize=1)
+def model_version() -> str:
+    """Content hash of the planner and engine sources, part of every cache key."""
+    root = Path(__file__).resolve().parents[1]
+    digest = hashlib.sha256()
+    for package in MODEL_PACKAGES:
+        for path in sorted((root / package).glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class StageCache:
+    """
+    Two-tier memo for the deterministic pipeline stages:
+    an in-process LRU in front of an optional size-bounded directory on disk.
+    """
+
+    def __init__(self, max_entries=1024, cache_dir=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {}
+
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_bytes = 0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*/*.pkl"))
+
+    def _count(self, stage, outcome):
+        stage_stats = self.stats.setdefault(stage, {"hits": 0, "disk_hits": 0, "misses": 0})
+        stage_stats[outcome] += 1
+
+    # --- DISK TIER ---
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def _disk_get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+            os.utime(path) # Mark as recently used for eviction
+            return True, value
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def _disk_put(self, key, value):
+        """Called without the lock held; only the byte counter is updated under it."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        try:
+            replaced = path.stat().st_size # Another process stored it first
+        except FileNotFoundError:
+            replaced = 0
+
+        # Write then rename so concurrent readers never see a partial file
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+        with self.lock:
+            self.disk_bytes += path.stat().st_size - replaced
+            over_budget = self.disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Deletes least recently used files until the store is back under 90% of its budget."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.pkl"):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                continue
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+        with self.lock:
+            self.disk_bytes = total
+
+    # --- LOOKUP ---
+
+    def get_or_compute(self, stage, key_parts, compute):
+        """
+        Returns compute() memoized under (stage, key_parts). Callers get their own copy.
+        Keys include model_version(), so entries from older planner or engine code never match.
+        """
+        key = canonical_hash(CACHE_VERSION, stage, model_version(), *key_parts)
+
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self._count(stage, "hits")
+                return copy.deepcopy(self.memory[key])
+
+        if self.cache_dir:
+            found, value = self._disk_get(key)
+            if found:
+                with self.lock:
+                    self._remember(key, value)
+                    self._count(stage, "disk_hits")
+                return copy.deepcopy(value)
+
+        value = compute()
+
+        with self.lock:
+            self._remember(key, value)
+            self._count(stage, "misses")
+        if self.cache_dir:
+            self._disk_put(key, value)
+
+        return copy.deepcopy(value)
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def report(self) -> dict:
+        """Hit/miss counts per stage plus the hit ratio and tier sizes."""
+        report = {"memory_entries": len(self.memory), "disk_bytes": self.disk_bytes}
+        for stage, counts in self.stats.items():
+            total = sum(counts.values())
+            hit_ratio = (counts['hits'] + counts['disk_hits']) / total if total else 0.0
+            report[stage] = {**counts, "hit_ratio": round(hit_ratio, 3)}
+        return report
+
+    def clear(self, disk=False):
+        with self.lock:
+            self.memory.clear()
+            self.stats.clear()
+            if disk and self.cache_dir:
+                self.disk_bytes = 0
+        if disk and self.cache_dir:
+            for path in self.cache_dir.glob("*/*.pkl"):
+                path.unlink(missing_ok=True)
+
+
+# --- MEMOIZED STAGES ---
+
+def cached_filter_compatible_modules(cache, module_input, env_data):
+    """filter_compatible_modules without the printed report, memoized on (catalog, environment)."""
+    return cache.get_or_compute(
+        "filter", (module_input, env_data),
+        lambda: filter_compatible_modules(module_input, env_data, verbose=False),
+    )
+
+
+def cached_optimize_loadout(cache, valid_modules, environment, mission, agents):
+    """optimize_loadout memoized on its inputs. Returns (loadout, n_hum, n_rob, agent_counts)."""
+    def compute():
+        agent_counts = {}
+        loadout, n_hum, n_rob = optimize_loadout(valid_modules, environment, mission, agents, agent_counts)
+        return loadout, n_hum, n_rob, agent_counts
+
+    return cache.get_or_compute("optimize", (valid_modules, environment, mission, agents), compute)
+
+
+def cached_run_simulation(cache, module_list, selected_env, n_hum, n_rob, duration_hours, monitors=None,
+                          agent_defs=None, agent_counts=None):
+    """
+    run_simulation memoized on its inputs. With agent_defs the run gets a population of
+    agent_counts, built inside the cached stage so the key stays a plain dict.
+    """
+    def compute():
+        agents = None
+        if agent_defs:
+            from stc.simulation.agents import build_population
+            agents = build_population(agent_defs, agent_counts or {})
+        return run_simulation(module_list, selected_env, n_hum, n_rob, duration_hours, monitors=monitors,
+                              agents=agents)
+
+    return cache.get_or_compute(
+        "simulate", (module_list, selected_env, n_hum, n_rob, duration_hours, monitors, agent_defs, agent_counts),
+        compute,
+    )
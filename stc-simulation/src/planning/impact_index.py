@@ -0,0 +1,248 @@
+# Standard library imports
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.planning.solver import RESOURCES
+from stc.planning.pipeline import evaluate_scenario
+
+# Module fields neither the planner nor the engine reads
+INERT_FIELDS = {'description', 'mass_tier'}
+# Fields that only decide whether filter_compatible_modules accepts a module
+VALIDITY_FIELDS = {'temp_range', 'pressure_range', 'max_gravity'}
+# Fields narrowed down to the resources and tags they touch
+FLOW_FIELDS = {'inputs', 'outputs'}
+TAG_FIELDS = {'provides_tags'}
+
+# Resources every scenario depends on: the planner's balances, habitat space and battery ratings
+MODELLED_RESOURCES = set(RESOURCES) | {'habitat_space', 'capacity', 'discharge_out', 'charge_in', 'labour'}
+
+
+def _entries(catalog: dict, section: str, key: str) -> dict:
+    return {item[key]: item for item in catalog.get(section, [])}
+
+
+def scenario_pairs(catalog: dict) -> dict:
+    """{(mission id, environment id): (mission, environment)} for every mission with a known environment."""
+    envs = _entries(catalog, 'environments', 'id')
+    return {
+        (mission['id'], mission['environment']): (mission, envs[mission['environment']])
+        for mission in catalog.get('missions', []) if mission.get('environment') in envs
+    }
+
+
+def build_impact_index(catalog: dict, plans=None) -> dict:
+    """
+    Reverse index from what a catalog edit can touch to the (mission, environment) pairs
+    that depend on it:
+      modules: module name -> pairs where it passes the compatibility filter
+      resources: resource -> pairs that model, require or consume it
+      tags: tag -> pairs where a compatible module needs it to run
+      plans: module name -> pairs whose stored plan uses it (planned: pairs with a stored plan)
+      environments / missions: id -> pairs
+    plans: baseline results {(mission, environment): evaluate_scenario result}.
+    The filter runs once per environment, not once per mission.
+    """
+    index = {"pairs": {}, "valid": {}, "modules": {}, "resources": {}, "tags": {}, "plans": {},
+             "environments": {}, "missions": {}}
+
+    agent_inputs = {res for agent in catalog.get('agents', []) for res in agent.get('inputs', {})}
+    for pair, (mission, env) in scenario_pairs(catalog).items():
+        if env['id'] not in index['valid']:
+            valid_modules, _ = filter_compatible_modules(catalog.get('modules', []), env, verbose=False)
+            index['valid'][env['id']] = valid_modules
+        valid_modules = index['valid'][env['id']]
+
+        index['pairs'][pair] = [m['name'] for m in valid_modules]
+        index['environments'].setdefault(env['id'], set()).add(pair)
+        index['missions'].setdefault(mission['id'], set()).add(pair)
+
+        resources = MODELLED_RESOURCES | agent_inputs | set(mission.get('requirements', {}))
+        for mod in valid_modules:
+            index['modules'].setdefault(mod['name'], set()).add(pair)
+            resources.update(mod.get('inputs', {}))
+            for tag in mod.get('requires_env_tags', []):
+                index['tags'].setdefault(tag, set()).add(pair)
+        for res in resources:
+            index['resources'].setdefault(res, set()).add(pair)
+
+    index['planned'] = set(plans or {})
+    for pair, result in (plans or {}).items():
+        for name in (result.get('loadout') or {}):
+            index['plans'].setdefault(name, set()).add(pair)
+    return index
+
+
+def diff_catalogs(old: dict, new: dict) -> dict:
+    """
+    Changed fields per entry: {'modules': {name: {field, ...}}, 'environments', 'missions', 'agents'}.
+    An added or removed entry lists all of its fields.
+    """
+    diff = {}
+    for section, key in (('modules', 'name'), ('environments', 'id'), ('missions', 'id'), ('agents', 'name')):
+        before, after = _entries(old, section, key), _entries(new, section, key)
+        changed = {}
+        for name in before.keys() | after.keys():
+            a, b = before.get(name, {}), after.get(name, {})
+            fields = {field for field in a.keys() | b.keys() if a.get(field) != b.get(field)}
+            if fields:
+                changed[name] = fields
+        diff[section] = changed
+    return diff
+
+
+def _changed_keys(a: dict, b: dict) -> set:
+    return {key for key in a.keys() | b.keys() if a.get(key, 0) != b.get(key, 0)}
+
+
+def _only_worse(old_mod: dict, new_mod: dict) -> bool:
+    """
+    True if the edit can only make a module less attractive: no input went down, no output
+    went up, no tag was gained. A module missing from an optimal plan stays out of it.
+    """
+    old_in, new_in = old_mod.get('inputs', {}), new_mod.get('inputs', {})
+    old_out, new_out = old_mod.get('outputs', {}), new_mod.get('outputs', {})
+    return (all(new_in.get(res, 0) >= amount for res, amount in old_in.items())
+            and all(amount <= old_out.get(res, 0) for res, amount in new_out.items())
+            and set(new_mod.get('provides_tags', [])) <= set(old_mod.get('provides_tags', [])))
+
+
+def affected_pairs(index: dict, old: dict, new: dict, diff=None) -> dict:
+    """
+    The minimal set of (mission, environment) pairs an edit can change, {pair: [reasons]}.
+    A module edit reaches a pair only if the module is compatible there before or after it,
+    and then only through fields, resources or tags the pair depends on. A module that is
+    not in the pair's stored plan and only got worse is skipped too.
+    """
+    diff = diff if diff is not None else diff_catalogs(old, new)
+    new_pairs = scenario_pairs(new)
+    affected = {}
+
+    def mark(pairs, reason):
+        for pair in pairs:
+            if pair in new_pairs:
+                affected.setdefault(pair, []).append(reason)
+
+    # 1. New scenarios, and every pair of a changed environment, mission or agent type
+    mark(set(new_pairs) - set(index['pairs']), "new scenario")
+    for env_id, fields in diff['environments'].items():
+        if fields - {'description'}:
+            mark(index['environments'].get(env_id, set()) | {p for p in new_pairs if p[1] == env_id},
+                 f"environment {env_id} changed")
+    for mission_id, fields in diff['missions'].items():
+        if fields - {'description'}:
+            mark(index['missions'].get(mission_id, set()) | {p for p in new_pairs if p[0] == mission_id},
+                 f"mission {mission_id} changed")
+    for agent_name, fields in diff['agents'].items():
+        if fields - {'description'}:
+            mark(new_pairs, f"agent {agent_name} changed")
+
+    # 2. Module edits, narrowed environment by environment
+    old_modules, new_modules = _entries(old, 'modules', 'name'), _entries(new, 'modules', 'name')
+    envs = _entries(new, 'environments', 'id')
+    for name, fields in diff['modules'].items():
+        functional = fields - INERT_FIELDS
+        if not functional:
+            continue
+        old_mod, new_mod = old_modules.get(name), new_modules.get(name)
+        changed_inputs = _changed_keys((old_mod or {}).get('inputs', {}), (new_mod or {}).get('inputs', {}))
+        changed_outputs = _changed_keys((old_mod or {}).get('outputs', {}), (new_mod or {}).get('outputs', {}))
+        changed_tags = set((old_mod or {}).get('provides_tags', [])) ^ set((new_mod or {}).get('provides_tags', []))
+        rest = functional - VALIDITY_FIELDS
+
+        for env_id, env in envs.items():
+            pairs = {p for p in new_pairs if p[1] == env_id}
+            if not pairs:
+                continue
+            valid_before = any(name in index['pairs'].get(p, ()) for p in pairs)
+            valid_after = new_mod is not None and bool(filter_compatible_modules([new_mod], env, verbose=False)[0])
+            if valid_before != valid_after:
+                mark(pairs, f"module {name} {'now' if valid_after else 'no longer'} compatible")
+                continue
+            if not valid_after or not rest:
+                continue
+
+            for pair in pairs:
+                if rest <= FLOW_FIELDS | TAG_FIELDS:
+                    # Outputs nothing in the pair uses, or tags nothing there needs
+                    if not (changed_inputs
+                            or any(pair in index['resources'].get(res, ()) for res in changed_outputs)
+                            or any(pair in index['tags'].get(tag, ()) for tag in changed_tags)):
+                        continue
+                    # Left out of the stored plan and only got worse: that plan is still optimal
+                    if pair in index['planned'] and pair not in index['plans'].get(name, ()) \
+                            and _only_worse(old_mod, new_mod):
+                        continue
+                mark([pair], f"module {name} {', '.join(sorted(rest))} changed")
+    return affected
+
+
+def scenario_delta(pair, before, after, reasons=()) -> dict:
+    """Before/after of one pair: loadout counts that moved, crew, feasibility and survival."""
+    before, after = before or {}, after or {}
+    old_loadout, new_loadout = before.get('loadout') or {}, after.get('loadout') or {}
+    loadout = {
+        name: (old_loadout.get(name, 0), new_loadout.get(name, 0))
+        for name in sorted(old_loadout.keys() | new_loadout.keys())
+        if old_loadout.get(name, 0) != new_loadout.get(name, 0)
+    }
+    delta = {"mission": pair[0], "environment": pair[1], "reasons": list(reasons), "loadout": loadout}
+    for key in ("feasible", "success", "goals_met", "n_hum", "n_rob", "hour"):
+        delta[key] = (before.get(key), after.get(key))
+    delta["changed"] = bool(loadout) or any(a != b for a, b in
+                                            (delta[k] for k in ("feasible", "success", "goals_met", "n_hum", "n_rob")))
+    return delta
+
+
+def baseline_from_store(conn, catalog_version) -> dict:
+    """Latest stored run per pair under `catalog_version`, in evaluate_scenario's shape."""
+    from stc.storage.result_store import latest_runs
+
+    return {
+        (row['mission'], row['environment']): {
+            "mission": row['mission'], "environment": row['environment'],
+            "loadout": row['loadout'] or {}, "n_hum": row['n_hum'], "n_rob": row['n_rob'],
+            "feasible": bool(row['feasible']), "success": bool(row['survived']),
+            "goals_met": bool(row['goals_met']), "hour": row['failure_hour'],
+            "failure_reason": row['failure_reason'], "resources": row['final_resources'] or {},
+        }
+        for row in latest_runs(conn, catalog_version)
+    }
+
+
+def evaluate_impact(old: dict, new: dict, baseline=None, cache=None, conn=None, early_stop=False) -> dict:
+    """
+    Re-evaluates only the pairs a catalog edit can change and reports before/after deltas.
+    old / new: catalogs as returned by loaders.catalog.load_catalog.
+    baseline: results under `old` ({pair: result}, e.g. baseline_from_store); pairs
+    missing from it are evaluated under `old` first, so deltas always have a 'before'.
+    conn: optional result store; the new results are recorded under the new catalog version.
+    Returns {'affected', 'skipped', 'deltas', 'results'}.
+    """
+    baseline = dict(baseline or {})
+    index = build_impact_index(old, baseline)
+    affected = affected_pairs(index, old, new)
+
+    old_pairs, new_pairs = scenario_pairs(old), scenario_pairs(new)
+    deltas, results = [], []
+    for pair in sorted(affected):
+        if pair not in baseline and pair in old_pairs:
+            mission, env = old_pairs[pair]
+            baseline[pair] = evaluate_scenario(old['modules'], env, mission, old['agents'], cache=cache,
+                                               early_stop=early_stop)
+        mission, env = new_pairs[pair]
+        after = evaluate_scenario(new['modules'], env, mission, new['agents'], cache=cache, early_stop=early_stop)
+        results.append(after)
+        deltas.append(scenario_delta(pair, baseline.get(pair), after, affected[pair]))
+
+    if conn is not None and results:
+        from stc.storage.result_store import record_results, catalog_version
+        record_results(conn, results, catalog_version=catalog_version(new))
+
+    return {
+        "affected": len(affected),
+        "skipped": len(new_pairs) - len(affected),
+        "deltas": deltas,
+        "results": results,
+    }
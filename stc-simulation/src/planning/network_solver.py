@@ -0,0 +1,132 @@
+# Standard library imports
+
+# Related third-party imports
+import pulp
+
+# Local application/library specific imports
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.constraints.resource_constraint import add_resource_constraint
+from stc.planning.solver import RESOURCES, build_loadout_model, extract_loadout
+from stc.planning.pipeline import expand_loadout, crew_population
+from stc.simulation.forcing import mean_solar_multiplier, mission_environment
+
+# Tiny cost per unit shipped, so the solver only moves what a site actually needs
+TRANSFER_COST = 1e-4
+
+
+def _constraint_items(prob):
+    """(name, constraint) pairs: PuLP 3.3+ returns a list from prob.constraints(), older releases a dict."""
+    if callable(prob.constraints):
+        return [(c.name, c) for c in prob.constraints()]
+    return list(prob.constraints.items())
+
+
+def build_network_model(sites, links, module_input, agents, duration=None):
+    """
+    One MILP for several linked sites, so a site short of a resource can be supplied by a neighbour.
+    sites: [{'id', 'environment': env dict, 'mission': mission dict}]
+    links: same format as simulation.network.run_network; capacity is per hour and a link is
+    usable for the shorter of its two sites' mission durations minus its latency.
+    Each site keeps its own single-site model (labour, power, habitat...); only the resource
+    accumulation constraints gain a net transfer term. Returns (prob, site_models, flows, links).
+    duration: overrides every site's mission duration for the link bounds.
+    """
+    prob = pulp.LpProblem("Network_Optimization", pulp.LpMinimize)
+    site_hours = {site['id']: duration or site['mission'].get('duration_hours', 24) for site in sites}
+
+    # 1. Total amount shipped over the mission, per link and resource; a link only runs
+    # while both of its sites do, so the shorter mission bounds it
+    flows = {}
+    for l, link in enumerate(links):
+        link_hours = min(site_hours[link['from']], site_hours[link['to']])
+        usable_hours = max(0, link_hours - int(link.get('latency_hours', 0)))
+        for res, capacity in link.get('capacity', {}).items():
+            if res in RESOURCES:
+                flows[(l, res)] = pulp.LpVariable(f"flow_{l}_{res}", lowBound=0, upBound=capacity * usable_hours)
+    flow_names = {v.name for v in flows.values()}
+
+    # 2. Every site's own model, merged under a site prefix
+    objective = []
+    site_models = {}
+    for i, site in enumerate(sites):
+        env, mission = site['environment'], site['mission']
+        valid_modules, _ = filter_compatible_modules(module_input, env, verbose=False)
+        site_model = build_loadout_model(valid_modules, env, mission, agents, nominal_resources=False)
+        site_prob, vars, colonists, robots, agent_vars = site_model
+
+        reqs = mission.get('requirements', {})
+        initial = env.get('initial_resources', {})
+        site_duration = mission.get('duration_hours', 24)
+        solar_factor = mean_solar_multiplier(mission_environment(env, mission), site_duration)
+        for res in RESOURCES:
+            inflow = pulp.lpSum([v for (l, r), v in flows.items() if r == res and links[l]['to'] == site['id']])
+            outflow = pulp.lpSum([v for (l, r), v in flows.items() if r == res and links[l]['from'] == site['id']])
+            add_resource_constraint(site_prob, res, valid_modules, vars, initial, reqs, site_duration, agents,
+                                    agent_vars, transfers=inflow - outflow, solar_factor=solar_factor)
+
+        # Variable and constraint names must be unique across the joint model
+        for v in site_prob.variables():
+            if v.name not in flow_names:
+                v.name = f"s{i}_{v.name}"
+        for name, constraint in _constraint_items(site_prob):
+            prob.addConstraint(constraint, name=f"s{i}_{name}")
+
+        objective.append(site_prob.objective)
+        site_models[site['id']] = site_model
+
+    prob += pulp.lpSum(objective) + TRANSFER_COST * pulp.lpSum(list(flows.values()))
+    return prob, site_models, flows, links
+
+
+def solve_network_model(model, solver=None) -> dict:
+    """
+    Solves a model from build_network_model.
+    Returns {'feasible', 'sites': {id: {'loadout', 'n_hum', 'n_rob', 'agent_counts'}}, 'transfers': [...]}.
+    """
+    prob, site_models, flows, links = model
+    status = prob.solve(solver or pulp.PULP_CBC_CMD(msg=0))
+    feasible = pulp.LpStatus[status] == 'Optimal'
+
+    sites = {}
+    for site_id, site_model in site_models.items():
+        agent_counts = {}
+        loadout, n_hum, n_rob = extract_loadout(site_model, status, agent_counts)
+        sites[site_id] = {"loadout": loadout, "n_hum": n_hum, "n_rob": n_rob, "agent_counts": agent_counts}
+
+    transfers = [
+        {"from": links[l]['from'], "to": links[l]['to'], "resource": res, "amount": round(v.varValue, 2)}
+        for (l, res), v in flows.items() if feasible and v.varValue > 1e-6
+    ]
+    return {"feasible": feasible, "sites": sites, "transfers": transfers}
+
+
+def optimize_network(sites, links, module_input, agents, duration=None) -> dict:
+    model = build_network_model(sites, links, module_input, agents, duration)
+    return solve_network_model(model)
+
+
+def network_links(plan, links) -> list:
+    """Links carrying the plan's transfer totals, so run_network ships what was planned."""
+    planned = [{} for _ in links]
+    index = {(link['from'], link['to']): l for l, link in enumerate(links)}
+    for transfer in plan['transfers']:
+        planned[index[(transfer['from'], transfer['to'])]][transfer['resource']] = transfer['amount']
+    return [{**link, "planned": amounts} for link, amounts in zip(links, planned)]
+
+
+def network_sites(plan, sites, module_input, agents=None) -> list:
+    """
+    Turns a network plan into run_network site dicts (loadouts expanded, crews filled in).
+    agents: the catalog agent types, so each crew is charged the upkeep the plan assumed.
+    """
+    return [
+        {
+            **{k: v for k, v in site.items() if k != 'mission'},
+            "environment": mission_environment(site['environment'], site['mission']),
+            "modules": expand_loadout(plan['sites'][site['id']]['loadout'] or {}, module_input),
+            "n_hum": plan['sites'][site['id']]['n_hum'],
+            "n_rob": plan['sites'][site['id']]['n_rob'],
+            "agents": crew_population(agents, plan['sites'][site['id']]['agent_counts']),
+        }
+        for site in sites
+    ]
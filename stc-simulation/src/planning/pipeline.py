@@ -0,0 +1,145 @@
+# Standard library imports
+import time
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.planning.solver import optimize_loadout
+from stc.simulation.engine import run_simulation
+from stc.simulation.monte_carlo import run_monte_carlo
+from stc.simulation.monitors import build_goal_monitors
+from stc.simulation.forcing import mission_environment
+from stc.planning.cache import cached_filter_compatible_modules, cached_optimize_loadout, cached_run_simulation
+from stc.storage.hashing import inputs_hash
+
+
+def mission_duration(mission: dict) -> int:
+    """Simulated hours for a mission, matching the CLI (requirement first, then duration_hours)."""
+    duration_req = mission.get('requirements', {}).get('duration', {})
+    return int(duration_req.get('minimum', mission.get('duration_hours', 24)))
+
+
+def expand_loadout(loadout: dict, valid_modules: list) -> list:
+    """
+    RE-HYDRATE: Convert {"Solar_Array": 3} -> [Solar_Dict, Solar_Dict, Solar_Dict]
+    """
+    module_map = {m['name']: m for m in valid_modules}
+    sim_list = []
+    for mod_name, count in loadout.items():
+        for _ in range(count):
+            sim_list.append(module_map[mod_name].copy())
+    return sim_list
+
+
+def crew_population(agents: list, agent_counts: dict):
+    """Per-agent population for a planned crew, or None when the catalog has no agent types."""
+    if not agents:
+        return None
+    from stc.simulation.agents import build_population
+    return build_population(agents, agent_counts)
+
+
+def evaluate_goals(mission: dict, final_resources: dict) -> tuple[bool, list]:
+    """
+    Phase 5 of the CLI: compares final stockpiles against the mission requirements.
+    Returns (all_goals_met, [(requirement, target, actual, met), ...]).
+    """
+    rows = []
+    all_met = True
+
+    for res_name, req_data in mission.get('requirements', {}).items():
+        # Skip 'duration' as that is handled by the simulation loop itself
+        if res_name == 'duration':
+            continue
+
+        target_value = req_data.get('minimum', 0)
+        actual_value = final_resources.get(res_name, 0)
+
+        met = actual_value >= target_value
+        if not met:
+            all_met = False
+        rows.append((res_name, target_value, actual_value, met))
+
+    return all_met, rows
+
+
+def evaluate_scenario(module_input, environment: dict, mission: dict, agents: list, cache=None, reliability=None,
+                      early_stop=False) -> dict:
+    """
+    Runs one scenario end to end (filter -> optimize -> simulate -> goals)
+    without printing, and returns a JSON-serialisable summary.
+    cache: optional planning.cache.StageCache memoizing each stage.
+    reliability: optional run_monte_carlo keyword arguments (trials, seed, ...) to also
+    estimate the loadout's survival probability.
+    early_stop: stop the simulation as soon as a mission goal becomes unreachable.
+    """
+    # Identifies the scenario in the result store, hashed before any stage rewrites its inputs
+    scenario_hash = inputs_hash(module_input, environment, mission, agents)
+
+    # The mission's start phase (e.g. a run that begins at local nightfall) applies to every stage
+    environment = mission_environment(environment, mission)
+
+    if cache is not None:
+        valid_modules, module_error_report = cached_filter_compatible_modules(cache, module_input, environment)
+    else:
+        valid_modules, module_error_report = filter_compatible_modules(module_input, environment, verbose=False)
+
+    solve_start = time.perf_counter()
+    if cache is not None:
+        loadout, n_hum, n_rob, agent_counts = cached_optimize_loadout(cache, valid_modules, environment, mission,
+                                                                      agents)
+    else:
+        agent_counts = {}
+        loadout, n_hum, n_rob = optimize_loadout(valid_modules, environment, mission, agents, agent_counts)
+    solve_seconds = time.perf_counter() - solve_start
+
+    result = {
+        "mission": mission.get('id'),
+        "environment": environment.get('id'),
+        "inputs_hash": scenario_hash,
+        "valid_modules": [m['name'] for m in valid_modules],
+        "rejected_modules": module_error_report,
+        "loadout": loadout,
+        "n_hum": n_hum,
+        "n_rob": n_rob,
+        "feasible": bool(loadout),
+        "solve_seconds": round(solve_seconds, 4),
+        "success": False,
+        "goals_met": False,
+        "hour": 0,
+        "failure_reason": None,
+        "resources": {},
+        "goals": [],
+    }
+
+    if not loadout:
+        result["failure_reason"] = "IMPOSSIBLE: No combination of modules can meet these goals."
+        return result
+
+    duration = mission_duration(mission)
+    sim_list = expand_loadout(loadout, valid_modules)
+    monitors = build_goal_monitors(mission) if early_stop else None
+    # The crew the planner chose is simulated with the same per-type upkeep the planner charged
+    if cache is not None:
+        sim_results = cached_run_simulation(cache, sim_list, environment, n_hum, n_rob, duration, monitors,
+                                            agent_defs=agents, agent_counts=agent_counts)
+    else:
+        sim_results = run_simulation(sim_list, environment, n_hum, n_rob, duration_hours=duration, monitors=monitors,
+                                     agents=crew_population(agents, agent_counts))
+    goals_met, goal_rows = evaluate_goals(mission, sim_results.get('resources', {}))
+
+    if reliability is not None:
+        result["reliability"] = run_monte_carlo(sim_list, environment, n_hum, n_rob, duration,
+                                                agents=crew_population(agents, agent_counts), **reliability)
+
+    result.update({
+        "success": sim_results['success'],
+        "goals_met": goals_met,
+        "hour": sim_results['hour'],
+        "failure_reason": sim_results.get('failure_reason'),
+        "goal_unreachable": sim_results.get('goal_unreachable', False),
+        "resources": sim_results.get('resources', {}),
+        "goals": [list(row) for row in goal_rows],
+    })
+    return result
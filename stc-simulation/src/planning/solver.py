@@ -4,11 +4,24 @@
 import pulp
 
 # Local application/library specific imports
-from constraints.resource_constraint import add_resource_constraint
-from constraints.labour_constraints import add_labor_constraint
-from constraints.power_constraints import add_power_constraint
-
-def optimize_loadout(valid_modules, environment, mission, agents):
+from stc.constraints.resource_constraint import add_resource_constraint
+from stc.constraints.labour_constraints import add_labor_constraint
+from stc.constraints.power_constraints import add_power_constraint
+from stc.constraints.agent_constraints import NAMED_AGENT_VARS, agent_variables
+from stc.simulation.forcing import mean_solar_multiplier, mission_environment
+
+# Resources whose accumulation over the mission is constrained
+RESOURCES = ['power', 'food', 'oxygen', 'water', 'waste', 'light', 'hydrogen']
+
+
+def build_loadout_model(valid_modules, environment, mission, agents, nominal_resources=True):
+    """
+    Builds the loadout MILP without solving it.
+    Returns (prob, vars, colonists, robots, agent_vars) so callers can keep the model and re-solve it.
+    agent_vars maps every agent type in the catalog to its count variable.
+    nominal_resources=False leaves out the resource accumulation constraints, for
+    callers that add their own per-scenario versions (planning.stochastic).
+    """
     prob = pulp.LpProblem("Mission_Optimization", pulp.LpMinimize)
 
     # 1. Decision Variables
@@ -16,19 +29,22 @@ def optimize_loadout(valid_modules, environment, mission, agents):
             for m in valid_modules}
     colonists = pulp.LpVariable("n_colonists", lowBound=0, cat='Integer')
     robots = pulp.LpVariable("n_robots", lowBound=0, cat='Integer')
+    agent_vars = agent_variables(agents, colonists, robots)
+    extra_agents = [v for name, v in agent_vars.items() if name not in NAMED_AGENT_VARS]
     
     # 2. Objective: Minimize total module count
-    prob += pulp.lpSum([vars[m['name']] for m in valid_modules]) + colonists + robots
+    prob += pulp.lpSum([vars[m['name']] for m in valid_modules]) + colonists + robots + pulp.lpSum(extra_agents)
 
     # 3. Environmental & Mission Setup
     reqs = mission.get('requirements', {})
     duration = mission.get('duration_hours', 24)
     initial = environment.get('initial_resources', {})
+    solar_factor = mean_solar_multiplier(mission_environment(environment, mission), duration)
 
     # 4. Define Module Subsets for Power Logic
-    add_power_constraint(valid_modules, agents, reqs, prob, vars)
+    add_power_constraint(valid_modules, agents, reqs, prob, vars, agent_vars)
 
-    add_labor_constraint(prob, valid_modules, vars, colonists, robots)
+    add_labor_constraint(prob, valid_modules, vars, agents, agent_vars)
 
     if reqs.get('module_num'):
         module_req = reqs.get('module_num')
@@ -68,17 +84,44 @@ def optimize_loadout(valid_modules, environment, mission, agents):
     prob += total_space_provided >= total_humans, "Crew_Housing_Requirement"  
 
     # --- GENERAL RESOURCE ACCUMULATION ---
-    resources = ['power', 'food', 'oxygen', 'water', 'waste', 'light', 'hydrogen']
-    for res in resources:
-        add_resource_constraint(prob, res, valid_modules, vars, initial, reqs, duration, agents, colonists, robots)
+    for res in (RESOURCES if nominal_resources else []):
+        add_resource_constraint(prob, res, valid_modules, vars, initial, reqs, duration, agents, agent_vars,
+                                solar_factor=solar_factor)
+
+    return prob, vars, colonists, robots, agent_vars
+
+
+def solve_loadout_model(model, solver=None, agent_counts=None):
+    """Solves a model from build_loadout_model. Returns (loadout, n_hum, n_rob) or (None, 0, 0)."""
+    prob = model[0]
 
     # 5. Solve
-    status = prob.solve(pulp.PULP_CBC_CMD(msg=0))
+    status = prob.solve(solver or pulp.PULP_CBC_CMD(msg=0))
+
+    return extract_loadout(model, status, agent_counts)
+
+
+def extract_loadout(model, status, agent_counts=None):
+    """
+    Reads (loadout, n_hum, n_rob) off a solved model, or (None, 0, 0) if it is not optimal.
+    agent_counts: optional dict, filled with {agent name: count} for every agent type.
+    """
+    prob, vars, colonists, robots, agent_vars = model
 
     if pulp.LpStatus[status] == 'Optimal':
         loadout = {name: int(var.varValue) for name, var in vars.items() if var.varValue > 0}
 
+        if agent_counts is not None:
+            agent_counts.update({'human': int(colonists.varValue), 'robot': int(robots.varValue)})
+            # Read the variables themselves: pulp may rewrite names that hold spaces or dashes
+            agent_counts.update({name: int(var.varValue) for name, var in agent_vars.items()})
+
         return loadout, int(colonists.varValue), int(robots.varValue)
 
 
-    return None, 0, 0
\ No newline at end of file
+    return None, 0, 0
+
+
+def optimize_loadout(valid_modules, environment, mission, agents, agent_counts=None):
+    model = build_loadout_model(valid_modules, environment, mission, agents)
+    return solve_loadout_model(model, agent_counts=agent_counts)
\ No newline at end of file
@@ -0,0 +1,72 @@
+# Standard library imports
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.planning.solver import optimize_loadout
+
+
+def _filter_and_solve(module_list, environment, mission, agents):
+    valid_modules, report = filter_compatible_modules(module_list, environment, verbose=False)
+    agent_counts = {}
+    loadout, n_hum, n_rob = optimize_loadout(valid_modules, environment, mission, agents, agent_counts)
+    return valid_modules, report, loadout, n_hum, n_rob, agent_counts
+
+
+class SpeculativeSolver:
+    """
+    Filters and solves every mission in the background while the CLI waits on input().
+    Threads are enough: the heavy part (CBC) runs as a subprocess outside the GIL.
+    Work for a module set that is no longer current is cancelled (if not yet started)
+    or discarded, and the new set is queued in mission order.
+    """
+
+    def __init__(self, missions, environments, agents, max_workers=None):
+        self.missions = missions
+        self.env_map = {e['id']: e for e in environments}
+        self.agents = agents
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1))
+        self.lock = threading.Lock()
+        self.key = None
+        self.futures = {}
+
+    def update(self, module_list):
+        """Call whenever the module set changes (e.g. after each removal)."""
+        key = tuple(m['name'] for m in module_list)
+
+        with self.lock:
+            if key == self.key:
+                return
+            for future in self.futures.values():
+                future.cancel()
+
+            self.key = key
+            self.futures = {}
+            for i, mission in enumerate(self.missions):
+                environment = self.env_map.get(mission['environment'])
+                if environment is None:
+                    continue # The CLI reports the missing environment itself
+                self.futures[i] = self.executor.submit(_filter_and_solve, module_list, environment, mission, self.agents)
+
+    def result(self, mission_index, module_list):
+        """
+        (valid_modules, report, loadout, n_hum, n_rob, agent_counts) for the chosen mission.
+        Uses the speculative result when it matches module_list, otherwise solves now.
+        """
+        key = tuple(m['name'] for m in module_list)
+
+        with self.lock:
+            future = self.futures.get(mission_index) if key == self.key else None
+
+        if future is not None and not future.cancelled():
+            return future.result()
+
+        mission = self.missions[mission_index]
+        return _filter_and_solve(module_list, self.env_map[mission['environment']], mission, self.agents)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,212 @@
+# Standard library imports
+import math
+
+# Related third-party imports
+import numpy as np
+import pulp
+
+# Local application/library specific imports
+from stc.planning.solver import RESOURCES, build_loadout_model, extract_loadout
+from stc.constraints.agent_constraints import agent_rate
+from stc.simulation.forcing import mean_solar_multiplier, mission_environment
+
+DEFAULT_SPREAD = {
+    'solar': 0.25, # Std. dev. of the solar output factor (dust, haze, panel soiling)
+    'initial': 0.2, # Initial stockpiles vary uniformly by +/- this fraction
+    'consumption': 0.1, # Std. dev. of the module and crew consumption factor
+}
+
+
+def scenario_count(n_decisions: int, epsilon: float = 0.05, confidence: float = 0.99) -> int:
+    """
+    Sample size for the scenario approach (Campi & Garatti): with this many scenarios a
+    loadout that satisfies all of them violates at most `epsilon` of the true
+    distribution, with probability `confidence`.
+    """
+    beta = 1.0 - confidence
+    return math.ceil((2.0 / epsilon) * (math.log(1.0 / beta) + n_decisions))
+
+
+def sample_scenarios(n: int, seed: int = 0, spread=None) -> dict:
+    """
+    n scenarios as factor arrays relative to the nominal environment and mission.
+    Scenario 0 is always the nominal case.
+    """
+    spread = {**DEFAULT_SPREAD, **(spread or {})}
+    rng = np.random.default_rng(seed)
+
+    scenarios = {
+        "solar": np.clip(rng.normal(1.0, spread['solar'], n), 0.0, None),
+        "initial": rng.uniform(1.0 - spread['initial'], 1.0 + spread['initial'], n),
+        "consumption": np.clip(rng.normal(1.0, spread['consumption'], n), 0.0, None),
+    }
+    for factors in scenarios.values():
+        factors[0] = 1.0
+    return scenarios
+
+
+def scenario_coefficients(valid_modules, environment, mission, agents, scenarios) -> dict:
+    """
+    Per-resource arrays for every scenario at once, mirroring add_resource_constraint:
+        initial[s] + coef[s] @ modules - sum(agents[type][s] * count[type]) >= target
+    """
+    reqs = mission.get('requirements', {})
+    duration = mission.get('duration_hours', 24)
+    initial = environment.get('initial_resources', {})
+
+    # Scenario factors scale the same mean forcing the nominal model uses
+    solar = scenarios['solar'][:, None] * mean_solar_multiplier(mission_environment(environment, mission), duration)
+    consumption = scenarios['consumption'][:, None]
+
+    blocks = {}
+    for res in RESOURCES:
+        out_val = np.array([m.get('outputs', {}).get(res, 0) for m in valid_modules], dtype=float)
+        in_val = np.array([m.get('inputs', {}).get(res, 0) for m in valid_modules], dtype=float)
+        is_solar = np.array([res == 'power' and "Solar" in m['name'] for m in valid_modules])
+
+        out_scaled = np.where(is_solar, out_val * solar, out_val)
+        coef = (out_scaled - in_val * consumption) * duration
+
+        res_req = reqs.get(res) or reqs.get(f"{res}_resilience")
+        target = res_req.get('minimum', 0) if isinstance(res_req, dict) else 0
+
+        blocks[res] = {
+            "coef": coef,
+            # Drain per agent type, net of the agent's own outputs as in add_resource_constraint
+            "agents": {a['name']: -agent_rate(a, res) * duration * scenarios['consumption'] for a in agents},
+            "initial": initial.get(res, 0) * scenarios['initial'],
+            "target": target,
+        }
+    return blocks
+
+
+def scenario_slack(blocks, counts, agent_counts) -> np.ndarray:
+    """
+    Worst resource slack per scenario for a fixed loadout; negative means violated.
+    agent_counts: {agent name: count}, as filled by extract_loadout.
+    """
+    worst = None
+    for block in blocks.values():
+        drain = sum(d * agent_counts.get(name, 0) for name, d in block['agents'].items())
+        slack = block['initial'] + block['coef'] @ counts - drain - block['target']
+        worst = slack if worst is None else np.minimum(worst, slack)
+    return worst
+
+
+def _add_scenario_block(prob, blocks, s, var_list, agent_vars, indicator=None, big_m=None):
+    """Adds scenario s's resource constraints; with an indicator they only bind when it is 1."""
+    for res, block in blocks.items():
+        terms = [(v, c) for v, c in zip(var_list, block['coef'][s]) if c != 0]
+        terms += [(var, -block['agents'][name][s]) for name, var in agent_vars.items()
+                  if block['agents'].get(name) is not None]
+        expr = pulp.LpAffineExpression(terms, constant=block['initial'][s])
+
+        if indicator is None:
+            prob += expr >= block['target'], f"Scenario_{s}_{res}"
+        else:
+            prob += expr + big_m[res][s] * (1 - indicator) >= block['target'], f"Scenario_{s}_{res}"
+
+
+def _big_m(blocks, max_units):
+    """Smallest M per scenario that lets an unselected scenario be violated by any bounded loadout."""
+    big_m = {}
+    for res, block in blocks.items():
+        drain = sum((np.maximum(d, 0) for d in block['agents'].values()), np.zeros_like(block['initial']))
+        worst = block['initial'] + (np.minimum(block['coef'], 0).sum(axis=1) - drain) * max_units
+        big_m[res] = np.maximum(block['target'] - worst, 0.0) + 1.0
+    return big_m
+
+
+def _solve(valid_modules, environment, mission, agents, blocks, active, fraction, max_units):
+    model = build_loadout_model(valid_modules, environment, mission, agents, nominal_resources=False)
+    prob, vars, colonists, robots, agent_vars = model
+
+    # Bounded counts keep the chance-constraint big-M finite
+    var_list = [vars[m['name']] for m in valid_modules]
+    for v in var_list + [colonists, robots] + list(agent_vars.values()):
+        v.upBound = max_units
+
+    if fraction >= 1.0:
+        for s in active:
+            _add_scenario_block(prob, blocks, s, var_list, agent_vars)
+    else:
+        big_m = _big_m(blocks, max_units)
+        indicators = {s: pulp.LpVariable(f"z_scenario_{s}", cat='Binary') for s in active}
+        for s in active:
+            _add_scenario_block(prob, blocks, s, var_list, agent_vars, indicators[s], big_m)
+        prob += pulp.lpSum(indicators.values()) >= math.ceil(fraction * len(active)), "Scenario_Coverage"
+
+    status = prob.solve(pulp.PULP_CBC_CMD(msg=0))
+    agent_counts = {}
+    loadout, n_hum, n_rob = extract_loadout(model, status, agent_counts)
+    return loadout, n_hum, n_rob, agent_counts
+
+
+def optimize_robust_loadout(valid_modules, environment, mission, agents, n_scenarios=None, fraction=1.0,
+                            seed=0, spread=None, decomposition=None, max_units=100, batch=10, max_iterations=50):
+    """
+    Two-stage planning: one shared loadout (first stage) that keeps the resource
+    balance of at least `fraction` of the sampled scenarios (second stage).
+
+    n_scenarios: defaults to scenario_count() for the number of decision variables.
+    decomposition: solve with a growing subset of scenarios, adding the most violated ones
+    until every scenario holds. Defaults to on above 50 scenarios. It only applies with
+    fraction 1.0: a working set enforced in full cannot trade scenarios off, so a chance
+    constraint is always solved directly over every scenario.
+    Returns a dict with the loadout, crew (n_hum, n_rob and agent_counts for every agent
+    type), achieved coverage and solve statistics. If the decomposition runs out of
+    max_iterations with scenarios still violated, the loadout is None and 'converged' is
+    False; 'coverage' then reports the best the last working set reached.
+    """
+    n_decisions = len(valid_modules) + len({'human', 'robot'} | {a['name'] for a in agents})
+    n_scenarios = n_scenarios or scenario_count(n_decisions)
+    decomposition = n_scenarios > 50 if decomposition is None else decomposition
+    decomposition = decomposition and fraction >= 1.0
+
+    scenarios = sample_scenarios(n_scenarios, seed=seed, spread=spread)
+    blocks = scenario_coefficients(valid_modules, environment, mission, agents, scenarios)
+    names = [m['name'] for m in valid_modules]
+
+    def coverage(loadout, agent_counts):
+        counts = np.array([loadout.get(n, 0) for n in names], dtype=float)
+        slack = scenario_slack(blocks, counts, agent_counts)
+        return slack, float((slack >= -1e-6).mean())
+
+    result = {"scenarios": n_scenarios, "fraction": fraction, "iterations": 0, "active_scenarios": n_scenarios,
+              "converged": True}
+
+    if not decomposition:
+        loadout, n_hum, n_rob, agent_counts = _solve(valid_modules, environment, mission, agents, blocks,
+                                                     list(range(n_scenarios)), fraction, max_units)
+        result["iterations"] = 1
+    else:
+        # Start from the nominal case, then add the worst violated scenarios each round
+        active = [0]
+        loadout = None
+        covered = 0.0
+        for iteration in range(1, max_iterations + 1):
+            result["iterations"] = iteration
+            loadout, n_hum, n_rob, agent_counts = _solve(valid_modules, environment, mission, agents, blocks,
+                                                         active, 1.0, max_units)
+            if loadout is None:
+                break
+
+            slack, covered = coverage(loadout, agent_counts)
+            if covered >= 1.0:
+                break
+
+            violated = [s for s in np.argsort(slack) if slack[s] < -1e-6 and s not in active]
+            active += [int(s) for s in violated[:batch]]
+        result["active_scenarios"] = len(active)
+
+        # Out of iterations with scenarios still violated: the last loadout is not robust
+        if loadout is not None and covered < 1.0:
+            return {**result, "converged": False, "loadout": None, "n_hum": 0, "n_rob": 0, "agent_counts": {},
+                    "coverage": round(covered, 4)}
+
+    if loadout is None:
+        return {**result, "loadout": None, "n_hum": 0, "n_rob": 0, "agent_counts": {}, "coverage": 0.0}
+
+    _, covered = coverage(loadout, agent_counts)
+    return {**result, "loadout": loadout, "n_hum": n_hum, "n_rob": n_rob, "agent_counts": agent_counts,
+            "coverage": round(covered, 4)}
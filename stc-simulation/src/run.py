@@ -8,27 +8,39 @@ from tabulate import tabulate
 
 # Local application/library specific imports
 # Loaders
-from loaders.environment_loader import open_environments
-from loaders.module_loader import open_modules
-from loaders.mission_loader import open_missions
-from loaders.agent_loader import open_agents
+from stc.loaders.environment_loader import open_environments
+from stc.loaders.module_loader import open_modules
+from stc.loaders.mission_loader import open_missions
+from stc.loaders.agent_loader import open_agents
 
 # Validators
-from validators.environment_validator import validate_environment_file
-from validators.module_validator import validate_module_file
-from validators.mission_validator import validate_mission_file
-from validators.agent_validator import validate_agent_file
+from stc.validators.environment_validator import validate_environment_file
+from stc.validators.module_validator import validate_module_file
+from stc.validators.mission_validator import validate_mission_file
+from stc.validators.agent_validator import validate_agent_file
 
 # Constraints
-from constraints.operational_constraints import filter_compatible_modules
+from stc.constraints.operational_constraints import print_filter_report
 
 # Solver & Planning
-from planning.solver import optimize_loadout
+from stc.planning.speculative import SpeculativeSolver
+from stc.planning.pipeline import crew_population
 
 # Simulation
-from simulation.engine import run_simulation
+from stc.simulation.engine import run_simulation
+from stc.simulation.forcing import mission_environment
+
+def apply_removals(mod_list, removed_modules):
+    """Returns the module list left after deleting each selected ID in turn."""
+    remaining = list(mod_list)
+    for i in removed_modules:
+        del remaining[int(i)]
+    return remaining
+
 
 def main():
+    speculator = None
+
     print("==========================================")
     print("STC SYSTEM: CLI")
     print("==========================================\n")
@@ -52,6 +64,10 @@ def main():
         validate_mission_file(mis_data, mis_schema)
         validate_agent_file(agt_data, agt_schema)
 
+        # Start filtering and solving every mission while the user reads the tables below
+        speculator = SpeculativeSolver(mission_profiles, env_data['environments'], agt_data['agents'])
+        speculator.update(mod_data['modules'])
+
         print("\n--- CUSTOMIZE MODULE LIST ---")
 
         print("--- ALL MODULES ---")
@@ -108,10 +124,10 @@ def main():
 
             else:
                 removed_modules.append(mod_input)
+                # Re-queue the speculative solves for the reduced module set
+                speculator.update(apply_removals(mod_data, removed_modules))
 
-        for i in removed_modules:
-            i = int(i)
-            del mod_data[i]
+        mod_data = apply_removals(mod_data, removed_modules)
 
         new_mod_data = {}
         
@@ -182,9 +198,10 @@ def main():
         valid_agents = agt_data['agents']
 
         print(f"\nStep 2: Checking Physics for {len(modules)} modules")
-        valid_modules, module_error_report = filter_compatible_modules(new_mod_data, selected_env)
-
-        recommended_modules, n_hum, n_rob = optimize_loadout(valid_modules, selected_env, selected_mission, valid_agents)
+        # Usually already solved in the background while the tables were on screen
+        valid_modules, module_error_report, recommended_modules, n_hum, n_rob, agent_counts = speculator.result(
+            mis_choice, modules)
+        print_filter_report(valid_modules, module_error_report)
 
         if recommended_modules:
             print("\nOptimal Loadout Found:")
@@ -215,7 +232,8 @@ def main():
  
 
         # 2. RUN SIM: Pass the list of DICTIONARIES, not the dictionary of COUNTS
-        sim_results = run_simulation(final_sim_list, selected_env, n_hum, n_rob, duration_hours=duration)
+        sim_results = run_simulation(final_sim_list, mission_environment(selected_env, selected_mission), n_hum, n_rob,
+                                     duration_hours=duration, agents=crew_population(valid_agents, agent_counts))
 
         # 3. REPORT RESULTS
         if sim_results['success']:
@@ -284,5 +302,9 @@ def main():
         import traceback
         print(f"❌ SYSTEM ERROR: {e}")
         traceback.print_exc() # Useful for debugging where exactly the .get() failed
+    finally:
+        if speculator is not None:
+            speculator.shutdown()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
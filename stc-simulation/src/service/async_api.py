@@ -0,0 +1,217 @@
+# Standard library imports
+import asyncio
+import os
+import re
+import tempfile
+import threading
+
+# Related third-party imports
+import pulp
+
+# Local application/library specific imports
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.planning.solver import build_loadout_model, extract_loadout
+from stc.planning.pipeline import mission_duration, expand_loadout, evaluate_goals, crew_population
+from stc.simulation.engine import run_simulation
+from stc.simulation.forcing import mission_environment
+
+# CBC log lines announcing a new incumbent, e.g. "Cbc0012I Integer solution of 13 found by DiveCoefficient after 0 iterations"
+INCUMBENT_PATTERN = re.compile(r"Cbc00(?:04|12)I Integer solution of (-?[\d.eE+]+)")
+
+
+class SimulationCancelled(Exception):
+    """Raised inside the simulation thread to stop it once the awaiting task is cancelled."""
+
+
+def _emit(events, event):
+    if events is not None:
+        events.put_nowait(event)
+
+
+class AsyncPlanner:
+    """
+    asyncio facade over planning.solver and simulation.engine.
+    CBC runs as an asyncio subprocess (killed on cancellation); filtering, model building
+    and simulations run in the default executor. One semaphore is shared by every request
+    and held once per request, so at most `max_concurrency` plans, simulations or whole
+    evaluations run at once.
+    """
+
+    def __init__(self, max_concurrency=8, time_limit=None, progress_every=12):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.time_limit = time_limit
+        self.progress_every = progress_every
+
+    async def _solve(self, model, events, agent_counts=None):
+        """Same as solve_loadout_model, but CBC is awaited and its log is streamed."""
+        prob = model[0]
+        solver = pulp.PULP_CBC_CMD(msg=0)
+        fd, tmp_sol = tempfile.mkstemp(suffix=".sol")
+        os.close(fd)
+        tmp_mps = tmp_sol[:-4] + ".mps"
+
+        loop = asyncio.get_running_loop()
+        vs, variables_names, constraints_names, _ = await loop.run_in_executor(
+            None, lambda: prob.writeMPS(tmp_mps, rename=1)
+        )
+
+        args = [tmp_mps]
+        if self.time_limit is not None:
+            args += ["-sec", str(self.time_limit)]
+        args += ["-solve", "-printingOptions", "all", "-solution", tmp_sol]
+
+        proc = await asyncio.create_subprocess_exec(
+            solver.path, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            stdin=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            async for raw in proc.stdout:
+                match = INCUMBENT_PATTERN.search(raw.decode(errors="replace"))
+                if match:
+                    _emit(events, {"type": "incumbent", "objective": float(match.group(1))})
+
+            if await proc.wait() != 0 or not os.path.exists(tmp_sol):
+                raise pulp.PulpSolverError(f"Pulp: Error while executing {solver.path}")
+
+            status, values, reduced_costs, shadow_prices, slacks, sol_status = solver.readsol_MPS(
+                tmp_sol, prob, vs, variables_names, constraints_names
+            )
+            prob.assignVarsVals(values)
+            prob.assignStatus(status, sol_status)
+            return extract_loadout(model, status, agent_counts)
+        except asyncio.CancelledError:
+            # A runaway solve must not outlive the task that asked for it
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        finally:
+            for path in (tmp_mps, tmp_sol):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    async def plan(self, valid_modules, environment, mission, agents, events=None, agent_counts=None):
+        """await plan(...) -> (loadout, n_hum, n_rob), like optimize_loadout."""
+        async with self.semaphore:
+            return await self._plan(valid_modules, environment, mission, agents, events, agent_counts)
+
+    async def _plan(self, valid_modules, environment, mission, agents, events, agent_counts):
+        loop = asyncio.get_running_loop()
+        _emit(events, {"type": "phase", "phase": "build_model"})
+        model = await loop.run_in_executor(None, build_loadout_model, valid_modules, environment, mission, agents)
+
+        _emit(events, {"type": "phase", "phase": "solve"})
+        return await self._solve(model, events, agent_counts)
+
+    async def simulate(self, module_list, selected_env, n_hum, n_rob, duration_hours, events=None, agents=None,
+                       mission=None):
+        """
+        await simulate(...) -> the run_simulation result dict. agents: optional population.
+        mission: optional mission whose start phase applies (see forcing.mission_environment).
+        """
+        async with self.semaphore:
+            return await self._simulate(module_list, mission_environment(selected_env, mission), n_hum, n_rob,
+                                        duration_hours, events, agents)
+
+    async def _simulate(self, module_list, selected_env, n_hum, n_rob, duration_hours, events, agents):
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+
+        def progress(hour, resources):
+            if cancelled.is_set():
+                raise SimulationCancelled(f"Simulation cancelled at hour {hour}.")
+            if events is not None and hour % self.progress_every == 0:
+                event = {"type": "hour", "hour": hour, "resources": dict(resources)}
+                loop.call_soon_threadsafe(events.put_nowait, event)
+
+        _emit(events, {"type": "phase", "phase": "simulate"})
+        try:
+            return await loop.run_in_executor(
+                None, lambda: run_simulation(module_list, selected_env, n_hum, n_rob, duration_hours,
+                                             progress=progress, agents=agents)
+            )
+        except asyncio.CancelledError:
+            cancelled.set() # The worker thread stops at its next hour
+            raise
+
+    async def evaluate(self, module_input, environment, mission, agents, events=None):
+        """Filter -> plan -> simulate -> goals, returning the same summary as pipeline.evaluate_scenario."""
+        async with self.semaphore:
+            return await self._evaluate(module_input, environment, mission, agents, events)
+
+    async def _evaluate(self, module_input, environment, mission, agents, events):
+        loop = asyncio.get_running_loop()
+        # The mission's start phase applies to every stage
+        environment = mission_environment(environment, mission)
+
+        _emit(events, {"type": "phase", "phase": "filter"})
+        valid_modules, module_error_report = await loop.run_in_executor(
+            None, lambda: filter_compatible_modules(module_input, environment, verbose=False)
+        )
+
+        agent_counts = {}
+        loadout, n_hum, n_rob = await self._plan(valid_modules, environment, mission, agents, events, agent_counts)
+        result = {
+            "mission": mission.get('id'), "environment": environment.get('id'),
+            "loadout": loadout, "n_hum": n_hum, "n_rob": n_rob, "feasible": bool(loadout),
+            "success": False, "goals_met": False, "failure_reason": None, "resources": {},
+        }
+        if not loadout:
+            result["failure_reason"] = "IMPOSSIBLE: No combination of modules can meet these goals."
+            return result
+
+        sim_results = await self._simulate(expand_loadout(loadout, valid_modules), environment, n_hum, n_rob,
+                                           mission_duration(mission), events, crew_population(agents, agent_counts))
+        goals_met, goal_rows = evaluate_goals(mission, sim_results['resources'])
+        result.update({
+            "success": sim_results['success'], "goals_met": goals_met, "hour": sim_results['hour'],
+            "failure_reason": sim_results.get('failure_reason'), "resources": sim_results['resources'],
+            "goals": [list(row) for row in goal_rows],
+        })
+        return result
+
+    async def evaluate_events(self, module_input, environment, mission, agents):
+        """
+        Async generator of progress events for one evaluation; the last event is
+        {"type": "done", "result": ...}. Closing the generator early cancels the work.
+        """
+        events = asyncio.Queue()
+        task = asyncio.create_task(self.evaluate(module_input, environment, mission, agents, events))
+        task.add_done_callback(lambda _: events.put_nowait(None))
+
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            yield {"type": "done", "result": task.result()}
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+
+_default_planner = None
+
+
+def _planner():
+    global _default_planner
+    if _default_planner is None:
+        _default_planner = AsyncPlanner()
+    return _default_planner
+
+
+async def plan(valid_modules, environment, mission, agents, events=None):
+    return await _planner().plan(valid_modules, environment, mission, agents, events)
+
+
+async def simulate(module_list, selected_env, n_hum, n_rob, duration_hours, events=None, mission=None):
+    return await _planner().simulate(module_list, selected_env, n_hum, n_rob, duration_hours, events, mission=mission)
+
+
+async def evaluate(module_input, environment, mission, agents, events=None):
+    return await _planner().evaluate(module_input, environment, mission, agents, events)
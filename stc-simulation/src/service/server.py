@@ -0,0 +1,285 @@
+# Standard library imports
+import argparse
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Related third-party imports
+from jsonschema.exceptions import ValidationError
+
+# Local application/library specific imports
+from stc.loaders.catalog import load_catalog, DATA_FILES
+from stc.loaders.shard_loader import source_mtime
+from stc.constraints.operational_constraints import filter_compatible_modules
+from stc.planning.solver import build_loadout_model, solve_loadout_model
+from stc.planning.pipeline import mission_duration, expand_loadout, evaluate_goals, crew_population
+from stc.simulation.engine import run_simulation
+from stc.simulation.forcing import mission_environment
+
+
+class PlanningService:
+    """
+    Holds the validated catalog and per-environment state in memory between requests.
+    The catalog is swapped atomically when a data file changes on disk.
+    max_models: built loadout models kept per catalog version, least recently used dropped first.
+    """
+
+    def __init__(self, poll_seconds=2.0, max_models=256):
+        self.poll_seconds = poll_seconds
+        self.max_models = max_models
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.version = 0
+        self._load()
+
+    # --- CATALOG ---
+
+    def _mtimes(self):
+        # Directories of shards report their newest file, so edits inside them trigger a reload
+        return {path: source_mtime(path) for path in DATA_FILES}
+
+    def _load(self):
+        mtimes = self._mtimes()
+        catalog = load_catalog()
+
+        state = {
+            "catalog": catalog,
+            "environments": {e['id']: e for e in catalog['environments']},
+            "missions": {m['id']: m for m in catalog['missions']},
+            # env_id -> valid modules, and (env_id, mission_id, excluded) -> [model, lock, solution]
+            "filtered": {},
+            "models": OrderedDict(),
+            "models_lock": threading.Lock(),
+        }
+
+        with self.lock:
+            self.version += 1
+            state['version'] = self.version
+            self.state = state
+            self.mtimes = mtimes
+
+    def watch(self, stop):
+        """Background thread: reloads the catalog when any data file changes."""
+        while not stop.wait(self.poll_seconds):
+            if self._mtimes() == self.mtimes:
+                continue
+            try:
+                self._load()
+                print(f"Catalog reloaded (version {self.version}).")
+            except (SystemExit, ValidationError) as e:
+                # Keep serving the last good catalog; the loaders already printed the details
+                print(f"❌ Reload failed, keeping catalog version {self.version}: {e}")
+                self.mtimes = self._mtimes()
+
+    def _valid_modules(self, state, env_id, excluded):
+        filtered = state['filtered'].get(env_id)
+        if filtered is None:
+            filtered, _ = filter_compatible_modules(state['catalog']['modules'], state['environments'][env_id], verbose=False)
+            state['filtered'][env_id] = filtered
+        return [m for m in filtered if m['name'] not in excluded]
+
+    def _resolve(self, state, body):
+        mission = state['missions'].get(body.get('mission'))
+        if mission is None:
+            raise KeyError(f"Unknown mission '{body.get('mission')}'.")
+
+        env_id = body.get('environment', mission['environment'])
+        if env_id not in state['environments']:
+            raise KeyError(f"Unknown environment '{env_id}'.")
+
+        return mission, env_id, frozenset(body.get('exclude_modules', []))
+
+    def _cached_model(self, state, key):
+        with state['models_lock']:
+            entry = state['models'].get(key)
+            if entry is not None:
+                state['models'].move_to_end(key)
+            return entry
+
+    def _store_model(self, state, key, entry):
+        """Keeps the first entry stored under key, so concurrent builders share one model."""
+        with state['models_lock']:
+            entry = state['models'].setdefault(key, entry)
+            state['models'].move_to_end(key)
+            while len(state['models']) > self.max_models:
+                state['models'].popitem(last=False)
+            return entry
+
+    # --- REQUESTS ---
+
+    # Each takes an optional state snapshot, so one request never mixes two catalog versions
+
+    def plan(self, body, state=None):
+        state = state or self.state
+        mission, env_id, excluded = self._resolve(state, body)
+        valid_modules = self._valid_modules(state, env_id, excluded)
+
+        key = (env_id, mission['id'], excluded)
+        entry = self._cached_model(state, key)
+        if entry is None:
+            environment = mission_environment(state['environments'][env_id], mission)
+            model = build_loadout_model(valid_modules, environment, mission, state['catalog']['agents'])
+            entry = self._store_model(state, key, [model, threading.Lock(), None])
+
+        # A pulp model stores its solution on the variables, so one solve per model at a time.
+        # The catalog is immutable between reloads, so the first solution is reused.
+        with entry[1]:
+            if entry[2] is None:
+                agent_counts = {}
+                entry[2] = solve_loadout_model(entry[0], agent_counts=agent_counts) + (agent_counts,)
+            loadout, n_hum, n_rob, agent_counts = entry[2]
+
+        return {
+            "mission": mission['id'], "environment": env_id, "catalog_version": state['version'],
+            "feasible": bool(loadout), "loadout": loadout, "n_hum": n_hum, "n_rob": n_rob,
+            "agent_counts": dict(agent_counts),
+        }
+
+    def simulate(self, body, state=None):
+        state = state or self.state
+        env_id = body.get('environment')
+        if env_id not in state['environments']:
+            raise KeyError(f"Unknown environment '{env_id}'.")
+
+        # An optional mission brings its own start phase, as in pipeline.evaluate_scenario
+        mission = None
+        if body.get('mission') is not None:
+            mission = state['missions'].get(body['mission'])
+            if mission is None:
+                raise KeyError(f"Unknown mission '{body['mission']}'.")
+        environment = mission_environment(state['environments'][env_id], mission)
+
+        valid_modules = self._valid_modules(state, env_id, frozenset())
+        duration = int(body.get('duration_hours', 24))
+        sim_list = expand_loadout(body.get('loadout', {}), valid_modules)
+        counts = {'human': int(body.get('n_hum', 0)), 'robot': int(body.get('n_rob', 0)),
+                  **body.get('agent_counts', {})}
+
+        return run_simulation(sim_list, environment, counts['human'], counts['robot'],
+                              duration_hours=duration, agents=crew_population(state['catalog']['agents'], counts))
+
+    def evaluate(self, body):
+        state = self.state
+        plan = self.plan(body, state)
+        if not plan['feasible']:
+            return {**plan, "success": False, "goals_met": False,
+                    "failure_reason": "IMPOSSIBLE: No combination of modules can meet these goals."}
+
+        mission = state['missions'][plan['mission']]
+        sim_results = self.simulate({
+            "environment": plan['environment'], "mission": plan['mission'], "loadout": plan['loadout'],
+            "n_hum": plan['n_hum'], "n_rob": plan['n_rob'], "agent_counts": plan['agent_counts'],
+            "duration_hours": mission_duration(mission),
+        }, state)
+        goals_met, goal_rows = evaluate_goals(mission, sim_results['resources'])
+
+        return {
+            **plan, "success": sim_results['success'], "goals_met": goals_met, "hour": sim_results['hour'],
+            "failure_reason": sim_results.get('failure_reason'), "resources": sim_results['resources'],
+            "goals": [list(row) for row in goal_rows],
+        }
+
+    # --- METRICS ---
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            samples = self.metrics.setdefault(endpoint, [])
+            samples.append(seconds)
+            # Bounded history, the percentiles only need the recent window
+            if len(samples) > 1000:
+                del samples[:len(samples) - 1000]
+
+    def metrics_report(self):
+        report = {"catalog_version": self.version}
+        with self.lock:
+            for endpoint, samples in self.metrics.items():
+                ordered = sorted(samples)
+                report[endpoint] = {
+                    "count": len(ordered),
+                    "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+                    "p50_ms": round(1000 * ordered[len(ordered) // 2], 3),
+                    "p95_ms": round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+                    "max_ms": round(1000 * ordered[-1], 3),
+                }
+        return report
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service = None # Set by serve()
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send(200, self.service.metrics_report())
+        elif self.path == "/health":
+            self._send(200, {"status": "ok", "catalog_version": self.service.version})
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        routes = {"/plan": self.service.plan, "/simulate": self.service.simulate, "/evaluate": self.service.evaluate}
+        handler = routes.get(self.path)
+        if handler is None:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            self._send(200, handler(body))
+        except KeyError as e:
+            self._send(404, {"error": str(e).strip("\"'")})
+        except (ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            # Anything else is a bug, not a bad request; keep the connection alive with a JSON reply
+            traceback.print_exc()
+            self._send(500, {"error": f"Internal error: {type(e).__name__}: {e}"})
+        finally:
+            self.service.record(self.path, time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        pass # Latency lives in /metrics, keep stdout for reload notices
+
+
+def serve(host="127.0.0.1", port=8765, poll_seconds=2.0, max_models=256):
+    service = PlanningService(poll_seconds=poll_seconds, max_models=max_models)
+    ServiceHandler.service = service
+
+    stop = threading.Event()
+    threading.Thread(target=service.watch, args=(stop,), daemon=True).start()
+
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    print(f"STC planning service listening on http://{host}:{port} (catalog version {service.version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-running STC planning service (JSON over HTTP).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between data file change checks.")
+    parser.add_argument("--max-models", type=int, default=256, help="Built loadout models kept in memory.")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.poll, args.max_models)
+
+
+if __name__ == "__main__":
+    main()
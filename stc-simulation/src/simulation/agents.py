@@ -0,0 +1,152 @@
+# Standard library imports
+
+# Related third-party imports
+import numpy as np
+
+# Local application/library specific imports
+
+# Agent inputs that are capacities (a bed), not something consumed every hour
+CAPACITY_INPUTS = {'habitat_space'}
+
+# Working below this fraction of rated output is the floor, however tired an agent is
+MIN_EFFICIENCY = 0.25
+
+# Optional per-type overrides for build_population, e.g. {'robot': {'maintenance_every': 168}}
+DEFAULT_PROFILE = {
+    'shift_hours': None, # Scheduled hours on duty per day, default = rated shift
+    'maintenance_every': 0, # Working hours between maintenance stops, 0 = never
+    'maintenance_hours': 0, # Hours out of service per stop
+}
+
+
+def rated_shift(agent: dict) -> int:
+    """
+    Hours per day an agent works at full output: its daily labour at one point per hour
+    (8 for a human, 24 for a robot). Fatigue builds over exactly one rated shift.
+    """
+    labour = agent.get('outputs', {}).get('labour', 0)
+    return int(min(24, max(1, labour))) if labour > 0 else 24
+
+
+def build_population(agent_defs, counts: dict, profiles=None) -> dict:
+    """
+    Struct-of-arrays state for every individual agent, advanced by step_population.
+    agent_defs: agent catalog entries; counts: {agent name: how many}.
+    Per agent: type, shift start and length, labour rate, fatigue and maintenance counters.
+    Per type: hourly input/output rows, so consumption is one matrix product per hour.
+    Crews of the same type are staggered around the clock.
+    """
+    profiles = profiles or {}
+    types = [a for a in agent_defs if counts.get(a['name'], 0) > 0]
+
+    resources = sorted({
+        res for a in types
+        for res in list(a.get('inputs', {})) + list(a.get('outputs', {}))
+        if res not in CAPACITY_INPUTS and res != 'labour'
+    })
+    inputs = np.array([[a.get('inputs', {}).get(r, 0) for r in resources] for a in types], dtype=float)
+    outputs = np.array([[a.get('outputs', {}).get(r, 0) for r in resources] for a in types], dtype=float)
+    type_counts = np.array([int(counts[a['name']]) for a in types], dtype=np.int64)
+
+    # Per-type parameters, broadcast to per-agent arrays with one np.repeat each
+    rated = np.array([rated_shift(a) for a in types], dtype=float)
+    merged = [{**DEFAULT_PROFILE, **profiles.get(a['name'], {})} for a in types]
+    shift = np.array([p['shift_hours'] or r for p, r in zip(merged, rated)], dtype=float)
+    labour_rate = np.array([a.get('outputs', {}).get('labour', 0) for a in types], dtype=float) / rated
+    fatigue_rate = np.where(rated < 24, 1.0 / rated, 0.0)
+    recovery_rate = np.where(rated < 24, 1.0 / np.maximum(1.0, 24.0 - rated), 0.0)
+    maint_every = np.array([p['maintenance_every'] for p in merged], dtype=float)
+    maint_hours = np.array([p['maintenance_hours'] for p in merged], dtype=float)
+
+    type_index = np.repeat(np.arange(len(types)), type_counts)
+    # Position of each agent within its own type, for staggering shifts
+    rank = np.arange(len(type_index)) - np.repeat(np.cumsum(type_counts) - type_counts, type_counts)
+
+    return {
+        "spec": {"agents": list(agent_defs), "counts": {a['name']: int(counts[a['name']]) for a in types},
+                 "profiles": profiles},
+        "type_names": [a['name'] for a in types],
+        "resources": resources,
+        "type_counts": type_counts,
+        "hourly_inputs": type_counts @ inputs if len(types) else np.zeros(0),
+        "hourly_outputs": type_counts @ outputs if len(types) else np.zeros(0),
+        "daily_labour": float(type_counts @ (labour_rate * rated)) if len(types) else 0.0,
+        # Per agent
+        "type": type_index,
+        "shift_start": (rank * shift[type_index]) % 24,
+        "shift_hours": shift[type_index],
+        "labour_rate": labour_rate[type_index],
+        "fatigue_rate": fatigue_rate[type_index],
+        "recovery_rate": recovery_rate[type_index],
+        "maintenance_every": maint_every[type_index],
+        "maintenance_hours": maint_hours[type_index],
+        "fatigue": np.zeros(len(type_index)),
+        "maintenance_due": maint_every[type_index].copy(),
+        "maintenance_left": np.zeros(len(type_index)),
+        "labour_today": 0.0,
+        # Upkeep the colony has no stock of (e.g. spare parts), tallied by the engine
+        "unsupplied": {},
+    }
+
+
+def step_population(pop: dict, hour: int):
+    """
+    Advances every agent by one hour.
+    Returns ({resource: consumed}, {resource: produced}, labour points delivered this hour).
+    Everyone eats and breathes every hour; only agents on shift and not in maintenance
+    work, at an efficiency that drops once they are past one rated shift of fatigue.
+    """
+    on_shift = ((hour - pop['shift_start']) % 24) < pop['shift_hours']
+    working = on_shift & (pop['maintenance_left'] <= 0)
+
+    # Fatigue builds on shift and recovers off it
+    pop['fatigue'] = np.where(working, pop['fatigue'] + pop['fatigue_rate'],
+                              np.maximum(0.0, pop['fatigue'] - pop['recovery_rate']))
+
+    efficiency = np.clip(2.0 - pop['fatigue'], MIN_EFFICIENCY, 1.0)
+    labour = float(np.dot(pop['labour_rate'] * efficiency, working))
+    pop['labour_today'] += labour
+
+    # Maintenance: count down working hours, then take the agent out of service
+    pop['maintenance_left'] = np.maximum(0.0, pop['maintenance_left'] - 1)
+    pop['maintenance_due'] -= working
+    due = (pop['maintenance_due'] <= 0) & (pop['maintenance_hours'] > 0)
+    if due.any():
+        pop['maintenance_left'][due] = pop['maintenance_hours'][due]
+        pop['maintenance_due'][due] = pop['maintenance_every'][due]
+
+    used = {r: float(v) for r, v in zip(pop['resources'], pop['hourly_inputs']) if v}
+    made = {r: float(v) for r, v in zip(pop['resources'], pop['hourly_outputs']) if v}
+    return used, made, labour
+
+
+def population_snapshot(pop: dict) -> dict:
+    """JSON-serialisable copy of the population: how it was built plus the per-agent counters."""
+    return {
+        "spec": pop['spec'],
+        "fatigue": pop['fatigue'].tolist(),
+        "maintenance_due": pop['maintenance_due'].tolist(),
+        "maintenance_left": pop['maintenance_left'].tolist(),
+        "labour_today": pop['labour_today'],
+        "unsupplied": dict(pop['unsupplied']),
+    }
+
+
+def restore_population(snapshot: dict, counts=None) -> dict:
+    """
+    Rebuilds a population from population_snapshot.
+    With new `counts` the population is rebuilt fresh (no per-agent history carries over).
+    """
+    spec = snapshot['spec']
+    if counts is not None and counts != spec['counts']:
+        pop = build_population(spec['agents'], counts, spec['profiles'])
+        pop['labour_today'] = snapshot['labour_today']
+        pop['unsupplied'] = dict(snapshot['unsupplied'])
+        return pop
+
+    pop = build_population(spec['agents'], spec['counts'], spec['profiles'])
+    for key in ("fatigue", "maintenance_due", "maintenance_left"):
+        pop[key] = np.array(snapshot[key], dtype=float)
+    pop['labour_today'] = snapshot['labour_today']
+    pop['unsupplied'] = dict(snapshot['unsupplied'])
+    return pop
@@ -1,19 +1,30 @@
-import math
+from stc.simulation.monitors import prepare_monitors, check_monitors
+from stc.simulation.forcing import solar_multipliers
 
-def run_simulation(module_list, selected_env, n_hum, n_rob, duration_hours):
+complexity_index = {
+    'very_low': 0.5, # Basic structural parts, no electronics
+    'low': 1, # Wires,
+    'medium': 2.5,
+    'high': 5,
+    'ultra': 10
+}
+
+
+def init_state(module_list, selected_env, n_hum, n_rob, resources=None, hour=0, logs=None, agents=None, forcing=None,
+               power_grid=None):
+    """
+    Builds the mutable state the hourly loop works on.
+    resources/hour/logs are only given when resuming from a snapshot.
+    agents: optional population from simulation.agents.build_population; its nominal
+    daily labour replaces the n_hum/n_rob estimate.
+    forcing: optional external forcing series (simulation.forcing.load_forcing_series);
+    by default the environment's own cached profile is used.
+    power_grid: optional bus layout for simulation.power_network.build_power_grid ({} for the
+    default pressurized/exterior grid); without it all power shares one bucket.
+    """
     # 1. Setup Resources and Environment
-    resources = selected_env.get('initial_resources', {}).copy()
-    base_tags = set(selected_env.get('tags', []))
-    logs = []
-
-    complexity_index = {
-        'very_low': 0.5, # Basic structural parts, no electronics
-        'low': 1, # Wires, 
-        'medium': 2.5,
-        'high': 5,
-        'ultra': 10
-    }
-    
+    resources = dict(resources) if resources is not None else selected_env.get('initial_resources', {}).copy()
+
     total_labour_req = 0
     total_labour_pro = 0
     total_labour = 0
@@ -28,103 +39,377 @@ def run_simulation(module_list, selected_env, n_hum, n_rob, duration_hours):
 
         total_labour_req += (base_labor * comp)
 
-        total_labour_pro = (n_hum * 8) + (n_rob * 24)
+        total_labour_pro = agents['daily_labour'] if agents is not None else (n_hum * 8) + (n_rob * 24)
 
         # Check if Labour Produced is Greater than Labour Required
         total_labour = total_labour_pro - total_labour_req
 
         resources["labour"] = total_labour
-    
+
+    grid = None
+    if power_grid is not None:
+        from stc.simulation.power_network import build_power_grid
+        grid = build_power_grid(module_list, selected_env, power_grid or None, resources.get('power', 0))
+
+    return {
+        "hour": hour,
+        "resources": resources,
+        "modules": module_list,
+        "env": selected_env,
+        "n_hum": n_hum,
+        "n_rob": n_rob,
+        "labour": total_labour,
+        "labour_required": total_labour_req,
+        "agents": agents,
+        "forcing": forcing,
+        "power_grid": grid,
+        "logs": list(logs) if logs else [],
+    }
+
+
+def advance(state, duration_hours, progress=None, snapshot_hours=(), monitors=None):
+    """
+    Runs the hourly loop from state['hour'] through hour `duration_hours` (inclusive).
+    Returns the run_simulation result dict; requested snapshots are under 'snapshots'.
+    monitors: goal monitors (simulation.monitors) checked after every hour; the run stops
+    with success False and 'goal_unreachable' True once a target can no longer be met.
+    With an agent population in the state, agents are charged their hourly inputs and
+    labour is balanced per day from what the crew actually delivered.
+    With a power grid in the state, power is dispatched per bus (simulation.power_network):
+    modules that lose their power are shed for the hour, and shedding a critical one fails the run.
+    """
+    module_list = state['modules']
+    resources = state['resources']
+    base_tags = set(state['env'].get('tags', []))
+    logs = state['logs']
+    total_labour = state['labour']
+    snapshot_hours = set(snapshot_hours)
+    snapshots = []
+
+    # Solar multipliers for this stretch, looked up once from the cached forcing profile
+    first_hour = state['hour']
+    solar = solar_multipliers(state['env'], first_hour, duration_hours + 1, state.get('forcing')).tolist()
+
+    population = state.get('agents')
+    tracked = None
+    if population is not None:
+        from stc.simulation.agents import step_population
+        # Agent upkeep is only charged for resources the colony stocks or makes
+        tracked = set(resources) | {res for m in module_list for res in m.get('outputs', {})}
+
+    prepared = None
+    if monitors:
+        prepared = prepare_monitors(monitors, module_list, state['env'], max(solar, default=0.0), population, tracked)
+
+    grid = state.get('power_grid')
+    if grid is not None:
+        from stc.simulation.power_network import dispatch_power, module_flows, grid_summary
+
+    def result(extra):
+        out = {"resources": resources, "logs": logs, **extra}
+        if snapshot_hours:
+            out["snapshots"] = snapshots
+        if population is not None:
+            out["agent_unsupplied"] = dict(population['unsupplied'])
+        if grid is not None:
+            out["power_grid"] = grid_summary(grid)
+        return out
 
     duration_hours = duration_hours + 1
 
-    for hour in range(duration_hours):
-        # solar_mult: Peak at 1.0 (noon), 0.0 at night (6pm-6am)
-        # Using (hour % 24) to track the daily cycle
-        solar_mult = max(0, math.sin(math.pi * (hour % 24) / 12))
-        
-        # 2. Dynamic Tag Collection
-        current_tags = base_tags.copy()
-        for mod in module_list:
-            for tag in mod.get('provides_tags', []):
-                current_tags.add(tag)
-
-        # 3. Calculate Power Flow & Process Non-Power Inputs
-        # We separate power because it's a "use-it-or-lose-it" resource
-        total_power_demand = 0
-        active_modules = []
-
-        for mod in module_list:
-            req_tags = mod.get('requires_env_tags', [])
-            if all(tag in current_tags for tag in req_tags):
-                active_modules.append(mod)
-                
-                # Calculate consumption
-                for res, amount in mod.get('inputs', {}).items():
+    for hour in range(state['hour'], duration_hours):
+        # solar_mult: the environment's irradiance relative to 1 AU, 0.0 at night,
+        # over its own day length (see simulation.forcing)
+        solar_mult = solar[hour - first_hour]
+
+        # Agent upkeep: every agent, every hour (robots draw power, crews eat and breathe)
+        agent_power = 0
+        if population is not None:
+            agent_used, agent_made, labour_delivered = step_population(population, hour)
+            for res, amount in agent_used.items():
+                if res == "power":
+                    agent_power += amount
+                elif res in tracked:
+                    resources[res] = round(resources.get(res, 0) - amount, 2)
+                else:
+                    population['unsupplied'][res] = round(population['unsupplied'].get(res, 0) + amount, 2)
+
+        if grid is not None:
+            # 3-5. Power network: dispatch per bus first, then only the modules that kept power run
+            dispatch = dispatch_power(grid, solar_mult, agent_power)
+            for res, amount in module_flows(grid, dispatch['shed']).items():
+                resources[res] = round(resources.get(res, 0) + amount, 2)
+            resources['power'] = round(dispatch['stored'], 2)
+        else:
+            # 2. Dynamic Tag Collection
+            current_tags = base_tags.copy()
+            for mod in module_list:
+                for tag in mod.get('provides_tags', []):
+                    current_tags.add(tag)
+
+            # 3. Calculate Power Flow & Process Non-Power Inputs
+            # We separate power because it's a "use-it-or-lose-it" resource
+            total_power_demand = agent_power
+            active_modules = []
+
+            for mod in module_list:
+                req_tags = mod.get('requires_env_tags', [])
+                if all(tag in current_tags for tag in req_tags):
+                    active_modules.append(mod)
+
+                    # Calculate consumption
+                    for res, amount in mod.get('inputs', {}).items():
+                        if res == "power":
+                            total_power_demand += amount
+                        elif res != "solar_exposure":
+                            # Non-power resources still accumulate/deplete normally
+                            resources[res] = round(resources.get(res, 0) - amount, 2)
+
+            # 4. Process Power Generation & Static Attributes
+            total_power_generation = 0
+            max_battery_capacity = 0 # Reset every hour to calculate current total
+            max_discharge = 0 # Hourly rate limits of the batteries
+            max_charge = 0
+
+            for mod in active_modules:
+                for res, amount in mod.get('outputs', {}).items():
                     if res == "power":
-                        total_power_demand += amount
-                    elif res != "solar_exposure":
-                        # Non-power resources still accumulate/deplete normally
-                        resources[res] = round(resources.get(res, 0) - amount, 2)
+                        if "Solar" in mod.get('name', ''):
+                            total_power_generation += amount * solar_mult
+                        else:
+                            total_power_generation += amount
+                    elif res == "capacity":
+                        # Track capacity but DON'T add it to the resources bucket
+                        max_battery_capacity += amount
+                        # No rating means no limit; charge_in defaults to discharge_out, as on a power grid
+                        outputs = mod['outputs']
+                        max_discharge += outputs.get('discharge_out', float('inf'))
+                        max_charge += outputs.get('charge_in', outputs.get('discharge_out', float('inf')))
+                    elif res in ("discharge_out", "charge_in"):
+                        continue # These are rate limits, not resources
+                    elif res != "habitat_space":
+                        # Only add actual consumable resources (Oxygen, Food, etc.)
+                        resources[res] = round(resources.get(res, 0) + amount, 2)
 
-        # 4. Process Power Generation & Static Attributes
-        total_power_generation = 0
-        max_battery_capacity = 0 # Reset every hour to calculate current total
+            # 5. The Power "Bucket" Constraint
+            net_power_flow = total_power_generation - total_power_demand
+            current_power = resources.get('power', 0)
 
-        for mod in active_modules:
-            for res, amount in mod.get('outputs', {}).items():
-                if res == "power":
-                    if "Solar" in mod.get('name', ''):
-                        total_power_generation += amount * solar_mult
-                    else:
-                        total_power_generation += amount
-                elif res == "capacity":
-                    # Track capacity but DON'T add it to the resources bucket
-                    max_battery_capacity += amount
-                elif res == "discharge_out":
-                    continue # This is a rate limit, not a resource
-                elif res != "habitat_space":
-                    # Only add actual consumable resources (Oxygen, Food, etc.)
-                    resources[res] = round(resources.get(res, 0) + amount, 2)
-
-        # 5. The Power "Bucket" Constraint
-        net_power_flow = total_power_generation - total_power_demand
-        current_power = resources.get('power', 0)
-
-        # Apply flow, but cap it at the current max_battery_capacity
-        resources['power'] = round(max(0, min(current_power + net_power_flow, max_battery_capacity)), 2)
+            # Batteries move at most their rated discharge/charge per hour; demand beyond the
+            # discharge rate goes unserved even with charge left
+            stored_flow = min(max(net_power_flow, -max_discharge), max_charge)
+            power_unserved = -net_power_flow - max_discharge
+
+            # Apply flow, but cap it at the current max_battery_capacity
+            resources['power'] = round(max(0, min(current_power + stored_flow, max_battery_capacity)), 2)
+
+        if population is not None:
+            for res, amount in agent_made.items():
+                resources[res] = round(resources.get(res, 0) + amount, 2)
+
+            # Daily labour balance from the hours actually worked (shifts, fatigue, maintenance)
+            if hour % 24 == 23:
+                total_labour = round(population['labour_today'] - state['labour_required'], 2)
+                resources['labour'] = state['labour'] = total_labour
+                population['labour_today'] = 0.0
+
+        state['hour'] = hour + 1
 
         # 6. Check for Resource Depletion
         for res, val in resources.items():
             if val < 0:
-                return {
-                    "success": False, "hour": hour, "resources": resources,
+                return result({
+                    "success": False, "hour": hour,
                     "failure_reason": f"CRITICAL FAILURE: {res} exhausted at hour {hour}.",
-                    "logs": logs
-                }
-        
+                })
+
         # If power dropped to 0 and we have a deficit, we failed the night
-        if resources['power'] <= 0 and net_power_flow < 0:
-             return {
-                "success": False, "hour": hour, "resources": resources,
+        if grid is None and resources['power'] <= 0 and net_power_flow < 0:
+             return result({
+                "success": False, "hour": hour,
                 "failure_reason": f"CRITICAL FAILURE: Power Grid Collapse at night.",
-                "logs": logs
-            }
-        
+            })
+
+        if grid is None and power_unserved > 1e-9:
+            return result({
+                "success": False, "hour": hour,
+                "failure_reason": f"CRITICAL FAILURE: Power demand exceeded the battery discharge rate by "
+                                  f"{round(power_unserved, 2)} at hour {hour}.",
+            })
+
+        if grid is not None and dispatch['agent_deficit']:
+            return result({
+                "success": False, "hour": hour,
+                "failure_reason": f"CRITICAL FAILURE: Agents on the {grid['buses'][grid['agent_bus']]} bus drew "
+                                  f"{round(dispatch['agent_deficit'], 2)} more power than the grid could supply.",
+            })
+
+        if grid is not None and dispatch['critical']:
+            return result({
+                "success": False, "hour": hour,
+                "failure_reason": f"CRITICAL FAILURE: Brownout on the {dispatch['critical_bus']} bus shed critical loads.",
+            })
+
         if total_labour < 0:
-            return {
-                "success": False, "hour": hour, "resources": resources,
+            return result({
+                "success": False, "hour": hour,
                 "failure_reason": f"CRITICAL FAILURE: Labour Needed exceeded Labour Provided.",
-                "logs": logs
-            }
+            })
 
         # 7. Logging
         if hour % 12 == 0:
             log_entry = f"Hour {hour:03d} | " + \
                         " | ".join([f"{k.capitalize()}: {v}" for k, v in resources.items()])
             logs.append(log_entry)
-    
 
-    return {
-        "success": True, "hour": duration_hours, "resources": resources, "logs": logs
-    }
\ No newline at end of file
+        if hour in snapshot_hours:
+            snapshots.append(snapshot_state(state))
+
+        if prepared is not None:
+            reason = check_monitors(prepared, resources, hour, duration_hours - 1)
+            if reason:
+                return result({"success": False, "hour": hour, "failure_reason": reason, "goal_unreachable": True})
+
+        if progress is not None:
+            progress(hour, resources)
+
+
+    return result({"success": True, "hour": duration_hours})
+
+
+def run_simulation(module_list, selected_env, n_hum, n_rob, duration_hours, progress=None, snapshot_hours=(),
+                   monitors=None, agents=None, forcing=None, power_grid=None):
+    """
+    progress: optional callable(hour, resources) invoked after every simulated hour.
+    Raising from it aborts the run (used for cancellation by async callers).
+    snapshot_hours: hours after which to capture a snapshot (see snapshot_state).
+    monitors: early-termination goal monitors, e.g. build_goal_monitors(mission).
+    agents: optional per-agent population (simulation.agents.build_population).
+    forcing: optional external forcing series, e.g. simulation.forcing.load_forcing_series(path).
+    power_grid: optional power network layout (simulation.power_network), {} for the default grid.
+    """
+    state = init_state(module_list, selected_env, n_hum, n_rob, agents=agents, forcing=forcing,
+                       power_grid=power_grid)
+    return advance(state, duration_hours, progress=progress, snapshot_hours=snapshot_hours, monitors=monitors)
+
+
+# --- SNAPSHOT, RESUME & FORK ---
+
+def snapshot_state(state) -> dict:
+    """
+    JSON-serialisable copy of a running simulation: the next hour to simulate,
+    stockpiles, battery level, crew and the loadout (definitions stored once per type).
+    """
+    current_tags = set(state['env'].get('tags', []))
+    module_defs = {}
+    module_counts = {}
+    for mod in state['modules']:
+        module_defs.setdefault(mod['name'], mod)
+        module_counts[mod['name']] = module_counts.get(mod['name'], 0) + 1
+        current_tags.update(mod.get('provides_tags', []))
+
+    active = [name for name, mod in module_defs.items()
+              if all(tag in current_tags for tag in mod.get('requires_env_tags', []))]
+
+    snapshot = {
+        "hour": state['hour'],
+        "resources": dict(state['resources']),
+        "battery_level": state['resources'].get('power', 0),
+        "n_hum": state['n_hum'],
+        "n_rob": state['n_rob'],
+        "environment": state['env'],
+        "modules": list(module_defs.values()),
+        "module_counts": module_counts,
+        "active_modules": active,
+        "logs": list(state['logs']),
+    }
+    if state.get('agents') is not None:
+        from stc.simulation.agents import population_snapshot
+        snapshot["agents"] = population_snapshot(state['agents'])
+    if state.get('power_grid') is not None:
+        from stc.simulation.power_network import grid_snapshot
+        snapshot["power_grid"] = grid_snapshot(state['power_grid'])
+    return snapshot
+
+
+def _scale_inputs(mod, scale):
+    """Copy of a module with its inputs scaled (float for all, or {resource: factor})."""
+    if isinstance(scale, dict):
+        inputs = {res: amount * scale.get(res, 1.0) for res, amount in mod.get('inputs', {}).items()}
+    else:
+        inputs = {res: amount * scale for res, amount in mod.get('inputs', {}).items()}
+    return {**mod, "inputs": inputs}
+
+
+def restore_state(snapshot, changes=None) -> dict:
+    """
+    Rebuilds a runnable state from a snapshot, optionally applying branch changes:
+      module_counts: {name: count} overrides (0 removes a module type)
+      modules: extra module definitions for types not in the snapshot
+      consumption_scale: float or {resource: factor} applied to module inputs
+      n_hum / n_rob / resources: overrides
+      agent_counts: {agent name: count} for a snapshot with an agent population
+    Module definitions are shared with the snapshot unless a change touches them,
+    so forking many branches from one snapshot copies almost nothing.
+    """
+    changes = changes or {}
+    module_defs = {m['name']: m for m in snapshot['modules']}
+    for mod in changes.get('modules', []):
+        module_defs[mod['name']] = mod
+
+    counts = {**snapshot['module_counts'], **changes.get('module_counts', {})}
+
+    scale = changes.get('consumption_scale')
+    if scale is not None:
+        module_defs = {name: _scale_inputs(mod, scale) for name, mod in module_defs.items()}
+
+    # Every copy of a module type points at the same definition, the engine never mutates them
+    module_list = []
+    for name, count in counts.items():
+        module_list.extend([module_defs[name]] * count)
+
+    resources = {**snapshot['resources'], **changes.get('resources', {})}
+
+    agents = None
+    if snapshot.get('agents') is not None:
+        from stc.simulation.agents import restore_population
+        agents = restore_population(snapshot['agents'], changes.get('agent_counts'))
+
+    grid = snapshot.get('power_grid')
+    state = init_state(
+        module_list, snapshot['environment'],
+        changes.get('n_hum', snapshot['n_hum']), changes.get('n_rob', snapshot['n_rob']),
+        resources=resources, hour=snapshot['hour'], logs=snapshot['logs'], agents=agents,
+        power_grid=grid['spec'] if grid is not None else None,
+    )
+    if grid is not None and 'power' not in changes.get('resources', {}):
+        from stc.simulation.power_network import restore_grid
+        restore_grid(state['power_grid'], grid)
+    return state
+
+
+def resume_simulation(snapshot, duration_hours, changes=None, progress=None, snapshot_hours=(), monitors=None,
+                      forcing=None):
+    """Continues a snapshot to `duration_hours`, same result shape as run_simulation."""
+    state = restore_state(snapshot, changes)
+    state['forcing'] = forcing
+    return advance(state, duration_hours, progress=progress, snapshot_hours=snapshot_hours, monitors=monitors)
+
+
+def _run_branch(args):
+    snapshot, duration_hours, changes, forcing = args
+    return resume_simulation(snapshot, duration_hours, changes, forcing=forcing)
+
+
+def fork_simulation(snapshot, branches, duration_hours, workers=1, forcing=None) -> list:
+    """
+    Runs every branch (a `changes` dict, see restore_state) from the same snapshot,
+    so the shared prefix is simulated once. Returns one result per branch, in order.
+    forcing: optional external forcing series, as for resume_simulation.
+    """
+    jobs = [(snapshot, duration_hours, changes, forcing) for changes in branches]
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_run_branch, jobs))
+    return [_run_branch(job) for job in jobs]
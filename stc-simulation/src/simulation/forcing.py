@@ -0,0 +1,124 @@
+# Standard library imports
+import threading
+
+# Related third-party imports
+import numpy as np
+
+# Local application/library specific imports
+from stc.loaders.shard_loader import resolve_data_path
+
+# Solar constant at 1 AU (W/m^2); module solar outputs are rated at this irradiance
+REFERENCE_FLUX = 1361.0
+
+# Local solar day per environment; an environment may override it with 'day_length_hours'
+DAY_LENGTH_HOURS = {
+    'mars_surface': 24.66, # One sol
+    'moon_surface': 708.7, # Synodic month
+    'venus_high_atmo': 96.0, # Cloud-top super-rotation, about four Earth days
+    'titan_surface': 382.7, # Tidally locked, one orbit of Saturn
+}
+DEFAULT_DAY_LENGTH = 24.0
+
+# The daily temperature peak trails the irradiance peak by this fraction of a day
+TEMPERATURE_LAG = 0.125
+
+# Column order of external forcing files
+FORCING_COLUMNS = ('irradiance', 'temperature')
+
+_profiles = {}
+_series = {}
+_lock = threading.Lock()
+
+
+def day_length(env: dict) -> float:
+    return float(env.get('day_length_hours', DAY_LENGTH_HOURS.get(env.get('id'), DEFAULT_DAY_LENGTH)))
+
+
+def start_phase(env: dict) -> float:
+    """Hours into the local day at mission hour 0: 0 is sunrise, half a day is sunset."""
+    return float(env.get('start_phase_hours', 0.0)) % day_length(env)
+
+
+def mission_environment(env: dict, mission) -> dict:
+    """The environment as a mission sees it: a mission's own 'start_phase_hours' overrides the environment's."""
+    if mission and 'start_phase_hours' in mission:
+        return {**env, 'start_phase_hours': mission['start_phase_hours']}
+    return env
+
+
+def environment_profile(env: dict, hours: int) -> dict:
+    """
+    Hourly forcing computed from the environment's own parameters: irradiance (W/m^2) from
+    'solar_flux' over its local day, and temperature swinging between its min and max,
+    both starting 'start_phase_hours' into that day (see start_phase).
+    Cached per parameter set and grown in powers of two, so every run of the same
+    environment shares one read-only array and no tick recomputes a sine.
+    """
+    temperature = env.get('temperature', {})
+    key = (env.get('solar_flux', REFERENCE_FLUX), day_length(env), start_phase(env),
+           temperature.get('min', 0.0), temperature.get('max', 0.0))
+
+    with _lock:
+        profile = _profiles.get(key)
+        if profile is None or len(profile['irradiance']) < hours:
+            flux, length, start, t_min, t_max = key
+            n = 1 << max(10, (max(hours, 1) - 1).bit_length())
+            phase = 2 * np.pi * ((np.arange(n) + start) % length) / length
+
+            profile = {
+                "irradiance": flux * np.maximum(0.0, np.sin(phase)),
+                "temperature": t_min + (t_max - t_min) * 0.5 * (1 + np.sin(phase - 2 * np.pi * TEMPERATURE_LAG)),
+            }
+            for values in profile.values():
+                values.flags.writeable = False
+            _profiles[key] = profile
+    return profile
+
+
+def load_forcing_series(path, columns=FORCING_COLUMNS, dtype='float32') -> dict:
+    """
+    Maps an hourly forcing time series without reading it into memory.
+    A .npy file is opened with mmap_mode='r'; any other file is read as raw `dtype` values,
+    one row of `columns` per hour. Returns {column: read-only view}, same keys as environment_profile.
+    A relative path is taken from the project folder, like the catalog files.
+    Only the hours a run actually touches are ever paged in.
+    """
+    path = resolve_data_path(path).resolve()
+    with _lock:
+        series = _series.get((path, tuple(columns), dtype))
+        if series is None:
+            if path.suffix == '.npy':
+                data = np.load(path, mmap_mode='r')
+            else:
+                data = np.memmap(path, dtype=dtype, mode='r')
+            data = data.reshape(-1, len(columns))
+            series = {column: data[:, i] for i, column in enumerate(columns)}
+            _series[(path, tuple(columns), dtype)] = series
+    return series
+
+
+def forcing_for(env: dict, hours: int, forcing=None) -> dict:
+    """The profile a run uses: an explicit one, the environment's 'forcing_file', or its own parameters."""
+    if forcing is not None:
+        profile = forcing
+    elif env.get('forcing_file'):
+        profile = load_forcing_series(env['forcing_file'])
+    else:
+        return environment_profile(env, hours)
+
+    if len(profile['irradiance']) < hours:
+        raise ValueError(f"Forcing series covers {len(profile['irradiance'])} hours, the run needs {hours}.")
+    return profile
+
+
+def solar_multipliers(env: dict, start: int, end: int, forcing=None) -> np.ndarray:
+    """Solar output multiplier for hours [start, end): irradiance relative to REFERENCE_FLUX."""
+    profile = forcing_for(env, end, forcing)
+    return np.asarray(profile['irradiance'][start:end], dtype=float) / REFERENCE_FLUX
+
+
+def mean_solar_multiplier(env: dict, duration_hours: int, forcing=None) -> float:
+    """Average solar multiplier over a mission, the planner's capacity factor for solar modules."""
+    if duration_hours <= 0:
+        return 0.0
+    return float(solar_multipliers(env, 0, int(duration_hours), forcing).mean())
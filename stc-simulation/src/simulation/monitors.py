@@ -0,0 +1,104 @@
+# Standard library imports
+
+# Related third-party imports
+
+# Local application/library specific imports
+
+# Requirement keys that are not stockpiles
+NON_RESOURCE_REQUIREMENTS = {'duration', 'module_num', 'population_support'}
+
+# Outputs that are ratings rather than stockpiles (same exclusions as the engine)
+NON_STOCK_OUTPUTS = {'capacity', 'discharge_out', 'charge_in', 'habitat_space'}
+
+# Most a stockpile can drift per rounding to 2 decimals, with room for float error
+ROUNDING_SLACK = 0.01
+
+
+def build_goal_monitors(mission: dict) -> list[dict]:
+    """One monitor per stockpile requirement with a minimum, e.g. food >= 10 at the end."""
+    monitors = []
+    for res_name, req_data in mission.get('requirements', {}).items():
+        if res_name in NON_RESOURCE_REQUIREMENTS or not isinstance(req_data, dict):
+            continue
+        if req_data.get('minimum') is not None:
+            monitors.append({"resource": res_name, "minimum": float(req_data['minimum'])})
+    return monitors
+
+
+def prepare_monitors(monitors, module_list, selected_env, solar_peak=1.0, agents=None, tracked=None) -> dict:
+    """
+    Precomputes the hourly rates the bounds need. Modules in this engine run every hour
+    they are active, so a stockpile's net rate is constant over the run; power is bounded
+    by peak generation (solar at `solar_peak`, the highest multiplier left in the run)
+    and battery capacity.
+    agents: optional population (simulation.agents); its hourly upkeep and outputs (e.g. a
+    crew's waste) are constant too. Upkeep only counts for `tracked` resources, as in the engine.
+    Also counts how many times per hour the engine rounds each stockpile.
+    """
+    current_tags = set(selected_env.get('tags', []))
+    for mod in module_list:
+        current_tags.update(mod.get('provides_tags', []))
+    active = [m for m in module_list if all(t in current_tags for t in m.get('requires_env_tags', []))]
+
+    net_rates = {}
+    rounding_ops = {'power': 1}
+    peak_power = 0.0
+    capacity = 0.0
+
+    def add(res, amount):
+        net_rates[res] = net_rates.get(res, 0.0) + amount
+        rounding_ops[res] = rounding_ops.get(res, 0) + 1
+
+    for mod in active:
+        for res, amount in mod.get('inputs', {}).items():
+            if res == 'power':
+                peak_power -= amount
+            elif res != 'solar_exposure':
+                add(res, -amount)
+        for res, amount in mod.get('outputs', {}).items():
+            if res == 'power':
+                peak_power += amount * solar_peak if "Solar" in mod.get('name', '') else amount
+            elif res == 'capacity':
+                capacity += amount
+            elif res not in NON_STOCK_OUTPUTS:
+                add(res, amount)
+
+    if agents is not None:
+        for res, used, made in zip(agents['resources'], agents['hourly_inputs'], agents['hourly_outputs']):
+            if used and res == 'power':
+                peak_power -= float(used)
+            elif used and (tracked is None or res in tracked):
+                add(res, -float(used))
+            if made:
+                add(res, float(made))
+
+    return {"monitors": monitors, "net_rates": net_rates, "rounding_ops": rounding_ops,
+            "peak_power": peak_power, "capacity": capacity}
+
+
+def reachable_upper_bound(prepared, resource, current, remaining_hours) -> float:
+    """Most of `resource` the colony can hold at the end of the mission from here."""
+    if resource == 'power':
+        gain = max(0.0, prepared['peak_power']) * remaining_hours
+        return min(prepared['capacity'], current + gain)
+    return current + prepared['net_rates'].get(resource, 0.0) * remaining_hours
+
+
+def check_monitors(prepared, resources, hour, duration_hours):
+    """
+    Returns a 'goal unreachable' reason once any target can no longer be met, else None.
+    `hour` has just been simulated; the run ends after hour `duration_hours`.
+    """
+    remaining = duration_hours - hour
+    if remaining <= 0:
+        return None # The final hour is judged by the mission goal evaluation itself
+
+    for monitor in prepared['monitors']:
+        res = monitor['resource']
+        bound = reachable_upper_bound(prepared, res, resources.get(res, 0), remaining)
+        # Slack absorbs the engine's 2-decimal rounding, every operation of every remaining hour
+        slack = ROUNDING_SLACK * max(1, prepared['rounding_ops'].get(res, 0)) * (remaining + 1)
+        if bound < monitor['minimum'] - slack:
+            return (f"GOAL UNREACHABLE: {res} can reach at most {round(bound, 2)} "
+                    f"of {monitor['minimum']} by hour {duration_hours} (checked at hour {hour}).")
+    return None
@@ -0,0 +1,330 @@
+# Standard library imports
+import copy
+from concurrent.futures import ProcessPoolExecutor
+
+# Related third-party imports
+import numpy as np
+
+# Local application/library specific imports
+from stc.simulation.engine import complexity_index
+from stc.simulation.forcing import solar_multipliers
+
+# Outputs that are ratings rather than stockpiles (same exclusions as the engine)
+NON_STOCK_OUTPUTS = {'power', 'capacity', 'discharge_out', 'charge_in', 'habitat_space'}
+NON_STOCK_INPUTS = {'power', 'solar_exposure'}
+
+DEFAULT_UNCERTAINTY = {
+    'dust_storm_start_prob': 0.002, # Per hour chance a storm begins
+    'dust_storm_mean_hours': 72.0,
+    'dust_derate': (0.3, 0.9), # Fraction of solar output lost during a storm (uniform)
+    'module_mtbf_hours': 2000.0, # Default, a module may set its own 'mtbf_hours'
+    'module_mttr_hours': 24.0, # Default, a module may set its own 'mttr_hours'
+    'consumption_sigma': 0.05, # Relative noise on every hourly input
+}
+
+# Trials per RNG stream. Fixed so results do not depend on the number of workers.
+CHUNK_TRIALS = 256
+
+
+def build_model(module_list, selected_env, n_hum, n_rob, uncertainty=None, agents=None) -> dict:
+    """
+    Groups the loadout into module types and lays out per-type rate arrays,
+    so every trial can be advanced with a handful of array operations per hour.
+    agents: optional population (simulation.agents.build_population); its hourly upkeep
+    and output are charged like the engine does, and its daily labour replaces n_hum/n_rob.
+    """
+    uncertainty = {**DEFAULT_UNCERTAINTY, **(uncertainty or {})}
+
+    # 1. Group identical modules, the unit of failure is still a single module
+    types = {}
+    for mod in module_list:
+        entry = types.setdefault(mod['name'], {"module": mod, "count": 0})
+        entry["count"] += 1
+    type_list = list(types.values())
+
+    # 2. Static activation, exactly as the engine's tag pass
+    current_tags = set(selected_env.get('tags', []))
+    for entry in type_list:
+        current_tags.update(entry["module"].get('provides_tags', []))
+    type_list = [e for e in type_list if all(t in current_tags for t in e["module"].get('requires_env_tags', []))]
+
+    # Tags that only modules provide (e.g. 'pressurized' from a habitat) are lost while every
+    # provider is down, and the modules that need them stop with them
+    base_tags = set(selected_env.get('tags', []))
+    module_tags = sorted({t for e in type_list for t in e["module"].get('requires_env_tags', [])} - base_tags)
+
+    # 3. Resource axis: every stockpile that appears anywhere
+    initial = dict(selected_env.get('initial_resources', {}))
+    resource_names = [r for r in initial if r != 'power']
+    for entry in type_list:
+        m = entry["module"]
+        for res in list(m.get('inputs', {})) + list(m.get('outputs', {})):
+            if res not in NON_STOCK_INPUTS and res not in NON_STOCK_OUTPUTS and res not in resource_names:
+                resource_names.append(res)
+
+    # Agent upkeep is only charged for resources the colony stocks or makes, as in the engine
+    agent_used, agent_made = {}, {}
+    if agents is not None:
+        tracked = set(initial) | {res for m in module_list for res in m.get('outputs', {})}
+        agent_used = {r: float(v) for r, v in zip(agents['resources'], agents['hourly_inputs'])
+                      if v and (r == 'power' or r in tracked)}
+        agent_made = {r: float(v) for r, v in zip(agents['resources'], agents['hourly_outputs']) if v}
+        resource_names += [r for r in {**agent_used, **agent_made} if r != 'power' and r not in resource_names]
+
+    # Labour is balanced daily in the engine: a constant stockpile here, reset by the
+    # population's labour schedule when there is one (see labour_schedule)
+    labour_req = 0.0
+    if module_list:
+        labour_req = sum(2 * complexity_index[m.get('complexity_tier', ['low'])[0]] for m in module_list)
+        labour_pro = agents['daily_labour'] if agents is not None else (n_hum * 8) + (n_rob * 24)
+        if 'labour' not in resource_names:
+            resource_names.append('labour')
+        initial['labour'] = labour_pro - labour_req
+
+    n_types, n_res = len(type_list), len(resource_names)
+    res_index = {r: i for i, r in enumerate(resource_names)}
+
+    inputs = np.zeros((n_types, n_res))
+    outputs = np.zeros((n_types, n_res))
+    power_in = np.zeros(n_types)
+    power_out = np.zeros(n_types)
+    capacity = np.zeros(n_types)
+    discharge_rate = np.zeros(n_types) # Hourly battery rate limits; unrated batteries are flagged instead
+    charge_rate = np.zeros(n_types)
+    unrated_discharge = np.zeros(n_types)
+    unrated_charge = np.zeros(n_types)
+    is_solar = np.zeros(n_types, dtype=bool)
+    fail_prob = np.zeros(n_types)
+    repair_prob = np.zeros(n_types)
+    tag_provides = np.zeros((n_types, len(module_tags)), dtype=np.int64)
+    tag_requires = np.zeros((n_types, len(module_tags)))
+
+    for t, entry in enumerate(type_list):
+        m = entry["module"]
+        for res, amount in m.get('inputs', {}).items():
+            if res == 'power':
+                power_in[t] = amount
+            elif res not in NON_STOCK_INPUTS:
+                inputs[t, res_index[res]] = amount
+        for res, amount in m.get('outputs', {}).items():
+            if res == 'power':
+                power_out[t] = amount
+            elif res == 'capacity':
+                capacity[t] = amount
+                # No rating means no limit; charge_in defaults to discharge_out, as in the engine
+                ratings = m['outputs']
+                discharge = ratings.get('discharge_out')
+                charge = ratings.get('charge_in', discharge)
+                discharge_rate[t], unrated_discharge[t] = (0.0, 1.0) if discharge is None else (discharge, 0.0)
+                charge_rate[t], unrated_charge[t] = (0.0, 1.0) if charge is None else (charge, 0.0)
+            elif res not in NON_STOCK_OUTPUTS:
+                outputs[t, res_index[res]] = amount
+        is_solar[t] = "Solar" in m.get('name', '')
+        fail_prob[t] = 1.0 / m.get('mtbf_hours', uncertainty['module_mtbf_hours'])
+        repair_prob[t] = 1.0 / m.get('mttr_hours', uncertainty['module_mttr_hours'])
+        for k, tag in enumerate(module_tags):
+            tag_provides[t, k] = tag in m.get('provides_tags', [])
+            tag_requires[t, k] = tag in m.get('requires_env_tags', [])
+
+    # The whole crew as one extra row: its upkeep is drawn every hour, whatever is running
+    agent_inputs = np.array([agent_used.get(r, 0.0) for r in resource_names])
+    agent_outputs = np.array([agent_made.get(r, 0.0) for r in resource_names])
+
+    return {
+        "type_names": [e["module"]['name'] for e in type_list],
+        "counts": np.array([e["count"] for e in type_list], dtype=np.int64),
+        "resource_names": resource_names,
+        "initial": np.array([initial.get(r, 0.0) for r in resource_names], dtype=float),
+        "initial_power": float(initial.get('power', 0.0)),
+        "inputs": inputs, "outputs": outputs,
+        "power_in": power_in, "power_out": power_out, "capacity": capacity, "is_solar": is_solar,
+        "discharge_rate": discharge_rate, "charge_rate": charge_rate,
+        "unrated_discharge": unrated_discharge, "unrated_charge": unrated_charge,
+        "fail_prob": fail_prob, "repair_prob": repair_prob,
+        "tag_provides": tag_provides, "tag_requires": tag_requires,
+        "agent_inputs": agent_inputs, "agent_outputs": agent_outputs,
+        "agent_power_in": agent_used.get('power', 0.0), "agent_power_out": agent_made.get('power', 0.0),
+        "labour_required": labour_req,
+        "uncertainty": uncertainty,
+    }
+
+
+def labour_schedule(agents, labour_required, duration_hours):
+    """
+    The labour balance after every hour, as the engine keeps it: rebalanced at the end of
+    each day from the labour the population actually delivered. None without a population.
+    Agent shifts, fatigue and maintenance carry no randomness, so one pass serves every trial.
+    """
+    if agents is None:
+        return None
+
+    from stc.simulation.agents import step_population
+    population = copy.deepcopy(agents)
+    labour = agents['daily_labour'] - labour_required
+    schedule = np.zeros(duration_hours + 1)
+    for hour in range(duration_hours + 1):
+        step_population(population, hour)
+        if hour % 24 == 23:
+            labour = round(population['labour_today'] - labour_required, 2)
+            population['labour_today'] = 0.0
+        schedule[hour] = labour
+    return schedule
+
+
+def simulate_chunk(model, n_trials, duration_hours, seed_seq) -> dict:
+    """Advances n_trials independent trials in lockstep. Returns per-trial outcome arrays."""
+    rng = np.random.default_rng(seed_seq)
+    u = model["uncertainty"]
+    n_res = len(model["resource_names"])
+    power_idx = n_res # Power sits after the stockpiles in the failure-cause axis
+
+    stock = np.tile(model["initial"], (n_trials, 1))
+    power = np.full(n_trials, model["initial_power"])
+    up = np.tile(model["counts"], (n_trials, 1))
+    storm_left = np.zeros(n_trials)
+    storm_derate = np.zeros(n_trials)
+
+    alive = np.ones(n_trials, dtype=bool)
+    fail_hour = np.full(n_trials, -1, dtype=np.int64)
+    fail_cause = np.full(n_trials, -1, dtype=np.int64)
+
+    solar_out = np.where(model["is_solar"], model["power_out"], 0.0)
+    steady_out = np.where(model["is_solar"], 0.0, model["power_out"])
+    labour_idx = model["resource_names"].index('labour') if 'labour' in model["resource_names"] else None
+
+    for hour in range(duration_hours + 1):
+        # 1. Forcing: the engine's irradiance profile, derated while a dust storm lasts
+        solar_mult = model["solar"][hour]
+        starting = (storm_left <= 0) & (rng.random(n_trials) < u['dust_storm_start_prob'])
+        storm_left[starting] = rng.exponential(u['dust_storm_mean_hours'], starting.sum())
+        storm_derate[starting] = rng.uniform(*u['dust_derate'], starting.sum())
+        in_storm = storm_left > 0
+        solar_trial = solar_mult * np.where(in_storm, 1.0 - storm_derate, 1.0)
+        storm_left -= 1
+
+        # 2. Outages and repairs, memoryless per module
+        down = model["counts"] - up
+        up = up - rng.binomial(up, model["fail_prob"]) + rng.binomial(down, model["repair_prob"])
+
+        # Modules whose required tag has no provider up this hour stand idle
+        running = up
+        if model["tag_requires"].shape[1]:
+            tag_lost = ((up @ model["tag_provides"]) == 0).astype(float)
+            running = np.where(tag_lost @ model["tag_requires"].T > 0, 0, up)
+
+        # 3. Stockpiles: noisy consumption first (crew upkeep, then modules), then production (engine order)
+        noise = np.clip(rng.normal(1.0, u['consumption_sigma'], (n_trials, n_res)), 0.0, None)
+        stock -= (model["agent_inputs"] + running @ model["inputs"]) * noise
+        stock += running @ model["outputs"]
+
+        # 4. Power bucket, capped by the batteries that are currently running
+        power_noise = np.clip(rng.normal(1.0, u['consumption_sigma'], n_trials), 0.0, None)
+        generation = running @ steady_out + (running @ solar_out) * solar_trial
+        net_power = generation - (model["agent_power_in"] + running @ model["power_in"]) * power_noise
+
+        # Running batteries move at most their rated discharge/charge per hour; demand beyond
+        # the discharge rate goes unserved even with charge left
+        max_discharge = np.where(running @ model["unrated_discharge"] > 0, np.inf, running @ model["discharge_rate"])
+        max_charge = np.where(running @ model["unrated_charge"] > 0, np.inf, running @ model["charge_rate"])
+        stored_flow = np.minimum(np.maximum(net_power, -max_discharge), max_charge)
+        power_unserved = -net_power - max_discharge
+        power = np.clip(power + stored_flow, 0.0, running @ model["capacity"])
+
+        # The crew's own output lands after the modules, and labour follows the daily balance
+        stock += model["agent_outputs"]
+        power += model["agent_power_out"]
+        if model["labour"] is not None and labour_idx is not None:
+            stock[:, labour_idx] = model["labour"][hour]
+
+        # 5. Failures, first exhausted stockpile wins like the engine's dict order
+        # The engine rounds to 2 decimals each hour, so float noise around zero is not a failure
+        exhausted = stock < -1e-9
+        any_exhausted = exhausted.any(axis=1)
+        collapse = (((power <= 0) & (net_power < 0)) | (power_unserved > 1e-9)) & ~any_exhausted
+
+        newly_failed = alive & (any_exhausted | collapse)
+        if newly_failed.any():
+            fail_hour[newly_failed] = hour
+            fail_cause[newly_failed] = np.where(any_exhausted, exhausted.argmax(axis=1), power_idx)[newly_failed]
+            alive &= ~newly_failed
+
+    return {
+        "alive": alive, "fail_hour": fail_hour, "fail_cause": fail_cause,
+        "final_stock": stock, "final_power": power,
+    }
+
+
+def _run_chunk(args):
+    model, n_trials, duration_hours, seed_seq = args
+    return simulate_chunk(model, n_trials, duration_hours, seed_seq)
+
+
+def run_monte_carlo(module_list, selected_env, n_hum, n_rob, duration_hours,
+                    trials=1000, seed=0, workers=1, uncertainty=None, bins=12, forcing=None, agents=None) -> dict:
+    """
+    Reliability of a loadout under dust storms, module outages and consumption noise.
+    Same seed and trial count always give the same answer, whatever `workers` is.
+    forcing: optional external forcing series, as for run_simulation.
+    agents: optional per-agent population, as for run_simulation; it is not modified.
+    """
+    if trials < 1:
+        raise ValueError(f"trials must be at least 1, got {trials}.")
+
+    model = build_model(module_list, selected_env, n_hum, n_rob, uncertainty, agents)
+    model["labour"] = labour_schedule(agents, model["labour_required"], duration_hours)
+    # Only the run's own hours of the forcing profile travel to the workers
+    model["solar"] = solar_multipliers(selected_env, 0, duration_hours + 1, forcing)
+
+    # 1. One independent RNG stream per fixed-size chunk of trials
+    chunk_sizes = [CHUNK_TRIALS] * (trials // CHUNK_TRIALS)
+    if trials % CHUNK_TRIALS:
+        chunk_sizes.append(trials % CHUNK_TRIALS)
+    streams = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    jobs = [(model, n, duration_hours, s) for n, s in zip(chunk_sizes, streams)]
+
+    # 2. Run chunks locally or across worker processes
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_chunk, jobs))
+    else:
+        chunks = [_run_chunk(job) for job in jobs]
+
+    alive = np.concatenate([c["alive"] for c in chunks])
+    fail_hour = np.concatenate([c["fail_hour"] for c in chunks])
+    fail_cause = np.concatenate([c["fail_cause"] for c in chunks])
+    final_stock = np.concatenate([c["final_stock"] for c in chunks])
+    final_power = np.concatenate([c["final_power"] for c in chunks])
+
+    # 3. Summarise
+    cause_names = model["resource_names"] + ['power']
+    failed_hours = fail_hour[~alive]
+    cause_counts = np.bincount(fail_cause[~alive], minlength=len(cause_names))
+    exhausted = {cause_names[i]: int(n) for i, n in enumerate(cause_counts) if n > 0}
+
+    report = {
+        "trials": trials,
+        "seed": seed,
+        "survival_probability": float(alive.mean()),
+        "failures": int((~alive).sum()),
+        "exhausted_counts": exhausted,
+        "most_exhausted": max(exhausted, key=exhausted.get) if exhausted else None,
+        "failure_hours": {},
+        "final_resources_mean": {},
+    }
+
+    if failed_hours.size:
+        counts, edges = np.histogram(failed_hours, bins=bins, range=(0, duration_hours + 1))
+        report["failure_hours"] = {
+            "min": int(failed_hours.min()),
+            "p10": float(np.percentile(failed_hours, 10)),
+            "median": float(np.median(failed_hours)),
+            "p90": float(np.percentile(failed_hours, 90)),
+            "histogram": {"counts": counts.tolist(), "edges": edges.round(1).tolist()},
+        }
+
+    if alive.any():
+        means = final_stock[alive].mean(axis=0)
+        report["final_resources_mean"] = {r: round(float(v), 2) for r, v in zip(model["resource_names"], means)}
+        report["final_resources_mean"]["power"] = round(float(final_power[alive].mean()), 2)
+
+    return report
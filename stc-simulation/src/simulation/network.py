@@ -0,0 +1,259 @@
+# Standard library imports
+import multiprocessing
+
+# Related third-party imports
+import numpy as np
+
+# Local application/library specific imports
+from stc.simulation.engine import init_state, advance
+
+
+# --- SITES (one shard per worker process, or one in-process shard) ---
+
+def _shard_start(sites) -> dict:
+    """Engine state for every site in this shard; sites keep their state for the whole run."""
+    return {
+        site['id']: {
+            "state": init_state(site['modules'], site['environment'], site.get('n_hum', 0), site.get('n_rob', 0),
+                                agents=site.get('agents'), forcing=site.get('forcing'),
+                                power_grid=site.get('power_grid')),
+            "result": None,
+        }
+        for site in sites
+    }
+
+
+def _shard_step(shard, upto, deltas) -> dict:
+    """
+    Applies the exchange deltas ({site: {resource: +/- amount}}) and advances every live
+    site through hour `upto`. Returns {site: (resources, alive)} for the next sync point.
+    """
+    ledgers = {}
+    for site_id, entry in shard.items():
+        resources = entry['state']['resources']
+        for res, amount in deltas.get(site_id, {}).items():
+            resources[res] = round(resources.get(res, 0) + amount, 2)
+
+        if entry['result'] is None:
+            out = advance(entry['state'], upto)
+            if not out['success']:
+                entry['result'] = out
+
+        ledgers[site_id] = (dict(resources), entry['result'] is None)
+    return ledgers
+
+
+def _shard_finish(shard, duration_hours) -> dict:
+    """Per-site results in run_simulation's shape."""
+    return {
+        site_id: entry['result'] or {
+            "success": True, "hour": duration_hours + 1,
+            "resources": entry['state']['resources'], "logs": entry['state']['logs'],
+        }
+        for site_id, entry in shard.items()
+    }
+
+
+def _shard_worker(conn, sites):
+    """Worker process: owns a shard of sites and answers one message per sync point."""
+    shard = _shard_start(sites)
+    while True:
+        command, *args = conn.recv()
+        if command == "step":
+            conn.send(_shard_step(shard, *args))
+        elif command == "finish":
+            conn.send(_shard_finish(shard, *args))
+            conn.close()
+            return
+
+
+# --- TRANSFERS ---
+
+def _link_arrays(sites, links, duration_hours):
+    """Dense arrays for the exchange step: site index per link end, per-hour capacity per resource."""
+    index = {site['id']: i for i, site in enumerate(sites)}
+    resources = sorted({res for link in links for res in link.get('capacity', {})})
+
+    def per_site(key, default):
+        return np.array([[site.get(key, {}).get(res, default) for res in resources] for site in sites], dtype=float)
+
+    return {
+        "index": index,
+        "resources": resources,
+        "src": np.array([index[link['from']] for link in links], dtype=np.int64),
+        "dst": np.array([index[link['to']] for link in links], dtype=np.int64),
+        "capacity": np.array([[link.get('capacity', {}).get(res, 0) for res in resources] for link in links],
+                             dtype=float).reshape(len(links), len(resources)),
+        "latency": np.array([int(link.get('latency_hours', 0)) for link in links], dtype=np.int64),
+        # Planned totals (planning.network_solver): shipped evenly instead of levelling, inf = unplanned
+        "quota": np.array([[link['planned'].get(res, 0) if 'planned' in link else np.inf for res in resources]
+                           for link in links], dtype=float).reshape(len(links), len(resources)),
+        "usable_hours": np.array([max(1, duration_hours - int(link.get('latency_hours', 0))) for link in links],
+                                 dtype=float),
+        # A site never exports below its reserve, nor imports above its target
+        "reserve": per_site('reserve', 0.0),
+        "target": per_site('target', np.inf),
+    }
+
+
+def plan_shipments(arrays, stock, inbound, alive, window_hours) -> np.ndarray:
+    """
+    Shipments [link, resource] for one sync point, for every link at once.
+    Each link moves stock toward the poorer end (half the difference, counting goods already
+    in transit), limited by link capacity, the sender's spare stock above its reserve and the
+    receiver's room below its target. Links with a planned total ship it evenly instead.
+    Senders and receivers shared by several links are scaled down proportionally so no
+    site over-ships or over-receives.
+    """
+    src, dst = arrays['src'], arrays['dst']
+    spare = np.maximum(0.0, stock - arrays['reserve'])
+    room = np.maximum(0.0, arrays['target'] - stock - inbound)
+    expected = stock + inbound
+
+    planned = np.isfinite(arrays['quota'])
+    level = np.maximum(0.0, (stock[src] - expected[dst]) / 2.0)
+    even_rate = np.where(planned, arrays['quota'] / arrays['usable_hours'][:, None], np.inf)
+
+    ship = np.minimum.reduce([
+        arrays['capacity'] * window_hours,
+        np.minimum(even_rate * window_hours, arrays['remaining']),
+        spare[src],
+        room[dst],
+        np.where(planned, np.inf, level),
+    ])
+    ship *= (alive[src] & alive[dst])[:, None]
+
+    for ends, limit in ((src, spare), (dst, room)):
+        total = np.zeros_like(stock)
+        np.add.at(total, ends, ship)
+        scale = np.where(total > limit, limit / np.where(total > 0, total, 1.0), 1.0)
+        ship *= scale[ends]
+
+    # Round down to the ledger's precision so a sender never dips below zero
+    return np.floor(ship * 100) / 100
+
+
+# --- NETWORK ---
+
+def run_network(sites, links, duration_hours, sync_hours=1, workers=1) -> dict:
+    """
+    Simulates several linked sites in lockstep.
+    sites: [{'id', 'environment', 'modules', 'n_hum', 'n_rob', optional 'agents', 'forcing',
+             'reserve': {res: amount}, 'target': {res: amount}}]
+    links: [{'from', 'to', 'capacity': {res: units per hour}, 'latency_hours'}], one direction each;
+    an optional 'planned': {res: total} (see planning.network_solver.network_links) fixes what it carries.
+    Every `sync_hours` all sites stop, the exchange for every link is computed in one batch,
+    shipments leave their sender and arrive `latency_hours` later. With workers > 1 the
+    sites are split across worker processes that keep their state between sync points.
+    """
+    arrays = _link_arrays(sites, links, duration_hours)
+    arrays['remaining'] = arrays['quota'].copy()
+    resources = arrays['resources']
+    n_sites, n_res = len(sites), len(resources)
+
+    # 1. Shards: one per worker process, or a single in-process one
+    site_ids = [site['id'] for site in sites]
+    workers = max(1, min(workers, n_sites))
+    if workers > 1:
+        ctx = multiprocessing.get_context()
+        pipes, procs = [], []
+        for w in range(workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_shard_worker, args=(child, sites[w::workers]), daemon=True)
+            proc.start()
+            pipes.append(parent)
+            procs.append(proc)
+        owner = {site['id']: w for w in range(workers) for site in sites[w::workers]}
+    else:
+        shard = _shard_start(sites)
+
+    def step(upto, deltas):
+        if workers == 1:
+            return _shard_step(shard, upto, deltas)
+        for w, pipe in enumerate(pipes):
+            pipe.send(("step", upto, {s: d for s, d in deltas.items() if owner[s] == w}))
+        ledgers = {}
+        for pipe in pipes:
+            ledgers.update(pipe.recv())
+        return ledgers
+
+    # 2. Lockstep loop
+    in_transit = [] # (arrival hour, destination index, amounts per resource)
+    shipped = np.zeros((len(links), n_res))
+    stock = np.array([[site['environment'].get('initial_resources', {}).get(res, 0) for res in resources]
+                      for site in sites], dtype=float).reshape(n_sites, n_res)
+    alive = np.ones(n_sites, dtype=bool)
+    deltas = {}
+
+    try:
+        for start in range(0, duration_hours + 1, sync_hours):
+            upto = min(start + sync_hours - 1, duration_hours)
+
+            # Deliveries due by now, then this sync point's shipments
+            arrived = np.zeros((n_sites, n_res))
+            pending = []
+            for hour, dst, amounts in in_transit:
+                if hour <= start:
+                    arrived[dst] += amounts
+                else:
+                    pending.append((hour, dst, amounts))
+            in_transit = pending
+
+            inbound = np.zeros((n_sites, n_res))
+            for _, dst, amounts in in_transit:
+                inbound[dst] += amounts
+
+            ship = plan_shipments(arrays, stock + arrived, inbound, alive, upto - start + 1) if links else None
+            change = arrived.copy()
+            if ship is not None and ship.any():
+                shipped += ship
+                arrays['remaining'] -= ship
+                np.subtract.at(change, arrays['src'], ship)
+                for l in np.nonzero(ship.any(axis=1))[0]:
+                    if arrays['latency'][l] == 0:
+                        change[arrays['dst'][l]] += ship[l]
+                    else:
+                        in_transit.append((start + arrays['latency'][l], arrays['dst'][l], ship[l]))
+
+            for i, j in zip(*np.nonzero(np.round(change, 2))):
+                deltas.setdefault(site_ids[i], {})[resources[j]] = float(round(change[i, j], 2))
+
+            ledgers = step(upto, deltas)
+            deltas = {}
+            for i, site_id in enumerate(site_ids):
+                site_resources, alive[i] = ledgers[site_id]
+                stock[i] = [site_resources.get(res, 0) for res in resources]
+
+        # 3. Results
+        if workers == 1:
+            results = _shard_finish(shard, duration_hours)
+        else:
+            results = {}
+            for pipe in pipes:
+                pipe.send(("finish", duration_hours))
+            for pipe in pipes:
+                results.update(pipe.recv())
+    finally:
+        if workers > 1:
+            for proc in procs:
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+
+    transfers = [
+        {"from": link['from'], "to": link['to'], "resource": res, "amount": round(float(shipped[l, j]), 2)}
+        for l, link in enumerate(links) for j, res in enumerate(resources) if shipped[l, j] > 0
+    ]
+    undelivered = {}
+    for _, dst, amounts in in_transit:
+        for j, amount in enumerate(amounts):
+            if amount > 0:
+                key = (site_ids[dst], resources[j])
+                undelivered[key] = round(undelivered.get(key, 0) + float(amount), 2)
+
+    return {
+        "success": all(r['success'] for r in results.values()),
+        "sites": {site_id: results[site_id] for site_id in site_ids},
+        "transfers": transfers,
+        "in_transit": [{"to": s, "resource": r, "amount": a} for (s, r), a in undelivered.items()],
+    }
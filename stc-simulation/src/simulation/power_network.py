@@ -0,0 +1,328 @@
+# Standard library imports
+
+# Related third-party imports
+import numpy as np
+
+# Local application/library specific imports
+
+# Used when no grid layout is given: modules inside the habitat on one bus, everything
+# else outside, joined by one unlimited line (capacity None = no limit)
+DEFAULT_GRID = {
+    'buses': ['exterior', 'pressurized'],
+    'lines': [{'from': 'exterior', 'to': 'pressurized', 'capacity': None}],
+}
+
+# Load shedding order: lower priorities are cut first. Shedding a module at or above
+# CRITICAL_PRIORITY is a brownout the colony does not survive.
+DEFAULT_PRIORITY = 1
+CRITICAL_PRIORITY = 10
+
+# Modules making these (and habitats) default to critical priority
+LIFE_SUPPORT = {'oxygen', 'water', 'food'}
+
+# Module outputs that describe the unit itself rather than something it produces
+POWER_ATTRIBUTES = {'power', 'capacity', 'discharge_out', 'charge_in', 'habitat_space'}
+NON_CONSUMABLE_INPUTS = {'power', 'solar_exposure'}
+
+EPS = 1e-9
+
+
+def module_bus(mod: dict, buses, assign: dict) -> str:
+    """Bus a module is wired to: an explicit assignment, else pressurized or exterior by its tags."""
+    if mod['name'] in assign:
+        return assign[mod['name']]
+    tags = set(mod.get('requires_env_tags', [])) | set(mod.get('provides_tags', []))
+    if 'pressurized' in tags and 'pressurized' in buses:
+        return 'pressurized'
+    return 'exterior' if 'exterior' in buses else buses[0]
+
+
+def module_priority(mod: dict, priority: dict) -> int:
+    """Shedding priority: an explicit one, else critical for life support and habitats."""
+    if mod['name'] in priority:
+        return priority[mod['name']]
+    if LIFE_SUPPORT & set(mod.get('outputs', {})) or 'pressurized' in mod.get('provides_tags', []):
+        return CRITICAL_PRIORITY
+    return DEFAULT_PRIORITY
+
+
+def build_power_grid(module_list, env: dict, spec=None, stored=0.0) -> dict:
+    """
+    Array state for the power network, advanced one hour at a time by dispatch_power.
+    spec: {'buses': [names], 'lines': [{'from', 'to', 'capacity': kW or None}],
+           'assign': {module name: bus}, 'priority': {module name: int}, 'agent_bus': bus}
+    Every module copy is one unit. Generation and load are summed per bus once here, so an
+    hour without a shortage only touches per-bus and per-battery arrays. Batteries
+    ('capacity' output) charge up to 'charge_in' and discharge up to 'discharge_out' per
+    hour (charge_in defaults to discharge_out) and pay their parasitic power input from
+    their own charge. `stored` is spread over the batteries in proportion to capacity.
+    """
+    spec = spec or DEFAULT_GRID
+    buses = list(spec.get('buses', DEFAULT_GRID['buses']))
+    index = {bus: i for i, bus in enumerate(buses)}
+    n = len(buses)
+
+    def bus_index(bus):
+        if bus not in index:
+            raise ValueError(f"Unknown power bus '{bus}', the grid has {buses}.")
+        return index[bus]
+
+    # 1. Lines: undirected, capacity per hour, parallel lines add up
+    lines = np.zeros((n, n))
+    for line in spec.get('lines', []):
+        a, b = bus_index(line['from']), bus_index(line['to'])
+        capacity = np.inf if line.get('capacity') is None else float(line['capacity'])
+        lines[a, b] += capacity
+        lines[b, a] += capacity
+
+    # 2. Units that can run at all in this environment (same tag rule as the engine)
+    tags = set(env.get('tags', []))
+    for mod in module_list:
+        tags.update(mod.get('provides_tags', []))
+    units = [mod for mod in module_list if all(tag in tags for tag in mod.get('requires_env_tags', []))]
+
+    assign, priority = spec.get('assign', {}), spec.get('priority', {})
+    is_battery = np.array([mod.get('outputs', {}).get('capacity', 0) > 0 for mod in units], dtype=bool)
+    unit_bus = np.array([bus_index(module_bus(mod, buses, assign)) for mod in units], dtype=np.int64)
+    unit_priority = np.array([module_priority(mod, priority) for mod in units], dtype=np.int64)
+    power_in = np.array([mod.get('inputs', {}).get('power', 0) for mod in units], dtype=float)
+    power_out = np.array([mod.get('outputs', {}).get('power', 0) for mod in units], dtype=float)
+    is_solar = np.array(["Solar" in mod.get('name', '') for mod in units], dtype=bool)
+    unit_load = np.where(is_battery, 0.0, power_in)
+
+    # 3. Non-power flows of every unit, so running modules are one matrix product
+    resources = sorted(
+        {res for mod in units for res in mod.get('inputs', {}) if res not in NON_CONSUMABLE_INPUTS} |
+        {res for mod in units for res in mod.get('outputs', {}) if res not in POWER_ATTRIBUTES}
+    )
+    inputs = np.array([[mod.get('inputs', {}).get(r, 0) for r in resources] for mod in units],
+                      dtype=float).reshape(len(units), len(resources))
+    outputs = np.array([[mod.get('outputs', {}).get(r, 0) for r in resources] for mod in units],
+                       dtype=float).reshape(len(units), len(resources))
+
+    # 4. Batteries
+    batteries = [mod for mod, b in zip(units, is_battery) if b]
+    capacity = np.array([mod['outputs']['capacity'] for mod in batteries], dtype=float)
+    discharge_limit = np.array([mod['outputs'].get('discharge_out', np.inf) for mod in batteries], dtype=float)
+    charge_limit = np.array([mod['outputs'].get('charge_in', mod['outputs'].get('discharge_out', np.inf))
+                             for mod in batteries], dtype=float)
+    total_capacity = capacity.sum()
+    level = capacity * min(1.0, max(0.0, stored) / total_capacity) if total_capacity > 0 else capacity.copy()
+
+    # 5. Shedding order per bus (priority, then catalog order) and the load already cut
+    # before each unit, so an hour's shedding is a single comparison against the deficit
+    order = np.lexsort((np.arange(len(units)), unit_priority, unit_bus))
+    load_sorted = unit_load[order]
+    bus_load = np.bincount(unit_bus, unit_load, n)
+    bus_offset = np.concatenate(([0.0], np.cumsum(bus_load)[:-1]))
+
+    return {
+        "spec": spec,
+        "buses": buses,
+        "lines": lines,
+        "agent_bus": bus_index(spec.get('agent_bus', 'pressurized' if 'pressurized' in index else buses[0])),
+        # Per unit
+        "unit_bus": unit_bus,
+        "unit_load": unit_load,
+        "critical": unit_priority >= CRITICAL_PRIORITY,
+        "resources": resources,
+        "inputs": inputs,
+        "outputs": outputs,
+        "net_flow": outputs.sum(axis=0) - inputs.sum(axis=0),
+        # Per bus
+        "fixed_gen": np.bincount(unit_bus, power_out * ~is_solar, n),
+        "solar_gen": np.bincount(unit_bus, power_out * is_solar, n),
+        "load": bus_load,
+        # Per battery
+        "battery_bus": unit_bus[is_battery],
+        "capacity": capacity,
+        "discharge_limit": discharge_limit,
+        "charge_limit": charge_limit,
+        "parasitic": power_in[is_battery],
+        "level": level,
+        # Shedding
+        "order": order,
+        "bus_sorted": unit_bus[order],
+        "prior_sorted": np.cumsum(load_sorted) - load_sorted - bus_offset[unit_bus[order]],
+        "sheddable_sorted": load_sorted > 0,
+        # Totals over the run
+        "shed_hours": np.zeros(n, dtype=np.int64),
+        "unserved": np.zeros(n),
+        "curtailed": 0.0,
+    }
+
+
+def _max_flow(supply, demand, lines):
+    """
+    Routes supply to demand over the bus lines (augmenting paths on the bus graph, which is small).
+    Returns (sent per bus, received per bus, residual line capacity).
+    """
+    n = len(supply)
+    source, sink = n, n + 1
+    cap = np.zeros((n + 2, n + 2))
+    cap[:n, :n] = lines
+    cap[source, :n] = supply
+    cap[:n, sink] = demand
+
+    while True:
+        parent = np.full(n + 2, -1)
+        parent[source] = source
+        queue = [source]
+        for u in queue:
+            for v in np.nonzero((cap[u] > EPS) & (parent < 0))[0]:
+                parent[v] = u
+                queue.append(v)
+            if parent[sink] >= 0:
+                break
+        if parent[sink] < 0:
+            break
+
+        path, v = [], sink
+        while v != source:
+            path.append((parent[v], v))
+            v = parent[v]
+        bottleneck = min(cap[u, v] for u, v in path)
+        for u, v in path:
+            cap[u, v] -= bottleneck
+            cap[v, u] += bottleneck
+
+    return supply - cap[source, :n], demand - cap[:n, sink], cap[:n, :n]
+
+
+def _share(amount, total):
+    """Fraction of each bus total that is used, 0 where the total is 0."""
+    return np.divide(amount, total, out=np.zeros(len(total)), where=total > EPS)
+
+
+def dispatch_power(grid: dict, solar_mult: float, extra_load=0.0) -> dict:
+    """
+    One hour of the power network: generation serves loads on its own bus, then other buses
+    over the lines; batteries cover what is still short within their discharge rate; anything
+    left short is shed (lowest priority first, whole modules), and spare generation charges
+    batteries within their charge rate or is curtailed.
+    extra_load: power drawn by agents, on the grid's agent bus; it is never shed.
+    Returns {'shed': bool per unit or None, 'critical': bool, 'critical_bus', 'agent_deficit', 'stored'}.
+    agent_deficit: agent demand left unserved after every module on the agent bus was shed;
+    the run fails on it even though no critical module caused the shortfall.
+    """
+    n = len(grid['buses'])
+    battery_bus = grid['battery_bus']
+
+    # 1. Batteries pay their parasitic draw from their own charge
+    level = np.maximum(0.0, grid['level'] - grid['parasitic'])
+
+    # 2. Generation against demand, bus by bus
+    net = grid['fixed_gen'] + grid['solar_gen'] * solar_mult - grid['load']
+    net[grid['agent_bus']] -= extra_load
+    surplus = np.maximum(0.0, net)
+    deficit = np.maximum(0.0, -net)
+
+    # 3. Spare generation crosses the lines to buses that are short
+    residual = grid['lines']
+    if (deficit > EPS).any() and (surplus > EPS).any():
+        sent, received, residual = _max_flow(surplus, deficit, residual)
+        surplus -= sent
+        deficit -= received
+
+    # 4. Batteries cover the rest within their discharge rate: on their own bus first,
+    # then over the line capacity left
+    headroom = np.minimum(level, grid['discharge_limit'])
+    bus_headroom = np.bincount(battery_bus, headroom, n)
+    discharge = np.minimum(deficit, bus_headroom)
+    deficit -= discharge
+    if (deficit > EPS).any() and (bus_headroom - discharge > EPS).any():
+        sent, received, residual = _max_flow(bus_headroom - discharge, deficit, residual)
+        discharge += sent
+        deficit -= received
+
+    # 5. Shed what is still short, lowest priority first; power freed beyond the deficit
+    # is first left in the batteries, the rest is spare again
+    shed = None
+    critical_bus = None
+    agent_deficit = 0.0
+    if (deficit > EPS).any():
+        shed = np.zeros(len(grid['unit_load']), dtype=bool)
+        shed[grid['order']] = (grid['prior_sorted'] < deficit[grid['bus_sorted']] - EPS) & grid['sheddable_sorted']
+        freed = np.bincount(grid['unit_bus'], grid['unit_load'] * shed, n)
+
+        # Only agent load is never shed, so a shortfall left after shedding is theirs
+        agent_deficit = max(0.0, float(deficit[grid['agent_bus']] - freed[grid['agent_bus']]))
+        failed = np.bincount(grid['unit_bus'], shed & grid['critical'], n) > 0
+        if failed.any():
+            critical_bus = grid['buses'][int(np.argmax(failed))]
+
+        excess = np.maximum(0.0, freed - deficit)
+        kept = np.minimum(excess, discharge)
+        discharge -= kept
+        surplus += excess - kept
+
+        grid['shed_hours'] += freed > 0
+        grid['unserved'] += freed
+
+    # 6. Surplus charges batteries: on its own bus first, then over the remaining line capacity
+    room = np.maximum(0.0, np.minimum(grid['capacity'] - level, grid['charge_limit']))
+    bus_room = np.bincount(battery_bus, room, n)
+    charge = np.minimum(surplus, bus_room)
+    surplus -= charge
+    if (surplus > EPS).any() and (bus_room - charge > EPS).any():
+        sent, received, _ = _max_flow(surplus, bus_room - charge, residual)
+        surplus -= sent
+        charge += received
+
+    # 7. Each battery takes its share of its bus's discharge and charge
+    level = level - headroom * _share(discharge, bus_headroom)[battery_bus] \
+                  + room * _share(charge, bus_room)[battery_bus]
+    grid['level'] = np.clip(level, 0.0, grid['capacity'])
+    grid['curtailed'] += float(surplus.sum())
+
+    return {
+        "shed": shed,
+        "critical": critical_bus is not None,
+        "critical_bus": critical_bus,
+        "agent_deficit": agent_deficit if agent_deficit > EPS else 0.0,
+        "stored": float(grid['level'].sum()),
+    }
+
+
+def module_flows(grid: dict, shed=None) -> dict:
+    """Net non-power flow {resource: amount} of every running unit this hour; shed units do nothing."""
+    net = grid['net_flow']
+    if shed is not None and shed.any():
+        net = net - shed.astype(float) @ (grid['outputs'] - grid['inputs'])
+    return dict(zip(grid['resources'], net.tolist()))
+
+
+def grid_summary(grid: dict) -> dict:
+    """Per-bus brownout totals for a run result."""
+    return {
+        "shed_hours": dict(zip(grid['buses'], grid['shed_hours'].tolist())),
+        "unserved": {bus: round(v, 2) for bus, v in zip(grid['buses'], grid['unserved'].tolist())},
+        "curtailed": round(grid['curtailed'], 2),
+        "battery_levels": {bus: round(float(v), 2) for bus, v in zip(
+            grid['buses'], np.bincount(grid['battery_bus'], grid['level'], len(grid['buses'])).tolist())},
+    }
+
+
+def grid_snapshot(grid: dict) -> dict:
+    """JSON-serialisable copy: the layout plus battery levels and run totals."""
+    return {
+        "spec": grid['spec'],
+        "level": grid['level'].tolist(),
+        "shed_hours": grid['shed_hours'].tolist(),
+        "unserved": grid['unserved'].tolist(),
+        "curtailed": grid['curtailed'],
+    }
+
+
+def restore_grid(grid: dict, snapshot: dict) -> dict:
+    """
+    Puts grid_snapshot's levels and totals back on a freshly built grid.
+    If the battery bank changed (a fork with other module counts) the fresh spread is kept.
+    """
+    if len(snapshot['level']) == len(grid['level']):
+        grid['level'] = np.array(snapshot['level'], dtype=float)
+    if len(snapshot['shed_hours']) == len(grid['buses']):
+        grid['shed_hours'] = np.array(snapshot['shed_hours'], dtype=np.int64)
+        grid['unserved'] = np.array(snapshot['unserved'], dtype=float)
+    grid['curtailed'] = snapshot['curtailed']
+    return grid
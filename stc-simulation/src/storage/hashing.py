@@ -0,0 +1,24 @@
+# Standard library imports
+import hashlib
+import json
+
+# Related third-party imports
+
+# Local application/library specific imports
+
+# Part of every hash; bump only to deliberately change every key and stored version at once
+HASH_VERSION = 1
+
+
+def canonical_hash(*parts) -> str:
+    """
+    Stable SHA-256 of any YAML-shaped data (dicts, lists, numbers, strings).
+    Key order does not matter; the same inputs hash the same across processes.
+    """
+    payload = json.dumps([HASH_VERSION, parts], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def inputs_hash(module_input, environment, mission, agents) -> str:
+    """Identity of one scenario's inputs, shared by stored runs and the stage cache."""
+    return canonical_hash(module_input, environment, mission, agents)
@@ -0,0 +1,209 @@
+# Standard library imports
+import json
+import sqlite3
+import time
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.storage.hashing import canonical_hash
+
+# Rows per executemany call inside one transaction
+DEFAULT_BATCH_SIZE = 5000
+# How long a connection waits on another process's write lock before giving up
+BUSY_TIMEOUT_MS = 30000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_at REAL NOT NULL,
+    inputs_hash TEXT,
+    catalog_version TEXT,
+    mission TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    loadout TEXT,
+    module_count INTEGER,
+    n_hum INTEGER,
+    n_rob INTEGER,
+    feasible INTEGER NOT NULL,
+    solve_seconds REAL,
+    survived INTEGER NOT NULL,
+    goals_met INTEGER NOT NULL,
+    failure_hour INTEGER,
+    failure_reason TEXT,
+    final_resources TEXT,
+    telemetry_ref TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_mission ON runs (mission, survived, goals_met, module_count);
+CREATE INDEX IF NOT EXISTS idx_runs_environment ON runs (environment, survived);
+CREATE INDEX IF NOT EXISTS idx_runs_outcome ON runs (survived, goals_met);
+CREATE INDEX IF NOT EXISTS idx_runs_catalog ON runs (catalog_version, mission, environment);
+CREATE INDEX IF NOT EXISTS idx_runs_inputs ON runs (inputs_hash);
+"""
+
+COLUMNS = [
+    "run_at", "inputs_hash", "catalog_version", "mission", "environment", "loadout", "module_count",
+    "n_hum", "n_rob", "feasible", "solve_seconds", "survived", "goals_met", "failure_hour",
+    "failure_reason", "final_resources", "telemetry_ref",
+]
+
+
+def open_store(db_path, wal=False) -> sqlite3.Connection:
+    """
+    Opens (and creates if needed) the result store.
+    wal: opt in to WAL when every reader and writer is on one host; the default rollback
+    journal also works on a filesystem shared between hosts.
+    """
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    try:
+        conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+    except sqlite3.OperationalError:
+        pass # Another connection holds the file open; keep its journal mode
+    if wal:
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def catalog_version(catalog: dict) -> str:
+    """Short content hash of a loaded catalog, usable as the 'catalog version' of a run."""
+    return canonical_hash(catalog)[:12]
+
+
+def row_from_result(result: dict, inputs_hash=None, catalog_version=None, telemetry_ref=None, run_at=None) -> tuple:
+    """Flattens a planning.pipeline.evaluate_scenario result into a `runs` row."""
+    loadout = result.get('loadout') or {}
+    survived = bool(result.get('success'))
+    return (
+        run_at or time.time(),
+        inputs_hash,
+        catalog_version,
+        result['mission'],
+        result['environment'],
+        json.dumps(loadout, sort_keys=True),
+        sum(loadout.values()),
+        result.get('n_hum', 0),
+        result.get('n_rob', 0),
+        int(bool(result.get('feasible'))),
+        result.get('solve_seconds'),
+        int(survived),
+        int(bool(result.get('goals_met'))),
+        None if survived else result.get('hour'),
+        result.get('failure_reason'),
+        json.dumps(result.get('resources', {}), sort_keys=True),
+        telemetry_ref,
+    )
+
+
+def insert_rows(conn, rows, batch_size=DEFAULT_BATCH_SIZE) -> int:
+    """
+    Bulk insert of pre-built rows (see row_from_result) in a single transaction,
+    fed to executemany in batches so memory stays flat for very large iterables.
+    """
+    sql = f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+    count = 0
+    batch = []
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            count += len(batch)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return count
+
+
+def record_results(conn, results, catalog_version=None, batch_size=DEFAULT_BATCH_SIZE) -> int:
+    """Stores evaluate_scenario results; each may carry an 'inputs_hash' and 'telemetry_ref'."""
+    rows = (
+        row_from_result(r, inputs_hash=r.get('inputs_hash'), catalog_version=catalog_version,
+                        telemetry_ref=r.get('telemetry_ref'))
+        for r in results
+    )
+    return insert_rows(conn, rows, batch_size=batch_size)
+
+
+# --- QUERIES ---
+
+def _decode(row) -> dict:
+    out = dict(row)
+    for key in ("loadout", "final_resources"):
+        if out.get(key):
+            out[key] = json.loads(out[key])
+    return out
+
+
+def cheapest_surviving_loadouts(conn, catalog_version=None) -> list[dict]:
+    """Per mission, the surviving run that met its goals with the fewest modules (latest on ties)."""
+    where = "WHERE survived = 1 AND goals_met = 1" + (" AND catalog_version = ?" if catalog_version else "")
+    params = (catalog_version,) if catalog_version else ()
+    rows = conn.execute(f"""
+        SELECT * FROM (
+            SELECT runs.*, ROW_NUMBER() OVER (
+                PARTITION BY mission ORDER BY module_count ASC, n_hum + n_rob ASC, run_at DESC
+            ) AS rank
+            FROM runs {where}
+        ) WHERE rank = 1 ORDER BY mission
+    """, params).fetchall()
+    return [_decode(r) for r in rows]
+
+
+def regressions_since(conn, catalog_version) -> list[dict]:
+    """
+    (mission, environment) pairs that survived with their goals met under `catalog_version`
+    but whose most recent run under any later catalog does not.
+    """
+    rows = conn.execute("""
+        WITH baseline AS (
+            SELECT mission, environment, MAX(run_at) AS since
+            FROM runs
+            WHERE catalog_version = ? AND survived = 1 AND goals_met = 1
+            GROUP BY mission, environment
+        ),
+        latest AS (
+            SELECT runs.*, ROW_NUMBER() OVER (
+                PARTITION BY runs.mission, runs.environment ORDER BY runs.run_at DESC
+            ) AS rank
+            FROM runs
+            JOIN baseline ON runs.mission = baseline.mission AND runs.environment = baseline.environment
+            WHERE runs.run_at > baseline.since AND runs.catalog_version IS NOT ?
+        )
+        SELECT * FROM latest WHERE rank = 1 AND (survived = 0 OR goals_met = 0) ORDER BY mission
+    """, (catalog_version, catalog_version)).fetchall()
+    return [_decode(r) for r in rows]
+
+
+def latest_runs(conn, catalog_version=None) -> list[dict]:
+    """The most recent run per (mission, environment), optionally under one catalog version."""
+    where = "WHERE catalog_version = ?" if catalog_version else ""
+    params = (catalog_version,) if catalog_version else ()
+    rows = conn.execute(f"""
+        SELECT * FROM (
+            SELECT runs.*, ROW_NUMBER() OVER (
+                PARTITION BY mission, environment ORDER BY run_at DESC, id DESC
+            ) AS rank
+            FROM runs {where}
+        ) WHERE rank = 1 ORDER BY mission, environment
+    """, params).fetchall()
+    return [_decode(r) for r in rows]
+
+
+def outcome_summary(conn) -> list[dict]:
+    """Run counts and survival rate per (mission, environment)."""
+    rows = conn.execute("""
+        SELECT mission, environment, COUNT(*) AS runs, SUM(survived) AS survived,
+               SUM(goals_met) AS goals_met, ROUND(AVG(survived), 4) AS survival_rate
+        FROM runs GROUP BY mission, environment ORDER BY mission, environment
+    """).fetchall()
+    return [dict(r) for r in rows]
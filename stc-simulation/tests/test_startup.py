@@ -0,0 +1,39 @@
+# Standard library imports
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Related third-party imports
+
+# Local application/library specific imports
+
+# Milliseconds `import stc.cli` may add to a bare interpreter start; override on slow CI hosts
+STARTUP_BUDGET_MS = float(os.environ.get("STC_STARTUP_BUDGET_MS", 150))
+REPEAT = 5
+
+
+def _python(code):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+
+def _median_seconds(code):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        _python(code)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def test_import_cli_loads_no_heavy_modules():
+    # stc.cli.HEAVY_MODULES: pulp, jsonschema, numpy and tabulate
+    probe = _python("import sys, stc.cli; print(','.join(m for m in stc.cli.HEAVY_MODULES if m in sys.modules))")
+    leaked = [m for m in probe.stdout.strip().split(",") if m]
+    assert leaked == [], f"`import stc.cli` loaded {', '.join(leaked)}"
+
+
+def test_import_cli_within_startup_budget():
+    overhead_ms = 1000 * (_median_seconds("import stc.cli") - _median_seconds("pass"))
+    assert overhead_ms <= STARTUP_BUDGET_MS, f"`import stc.cli` took {overhead_ms:.1f} ms over a bare interpreter"
@@ -0,0 +1,39 @@
+# Standard library imports
+
+# Related third-party imports
+
+# Local application/library specific imports
+from stc.planning.stochastic import optimize_robust_loadout
+
+ENVIRONMENT = {"id": "test_site", "tags": [], "initial_resources": {"oxygen": 50}}
+MISSION = {
+    "id": "TEST_OXYGEN",
+    "duration_hours": 10,
+    "requirements": {"oxygen": {"minimum": 40}, "module_num": {"metric": "Oxygen_Sink", "minimum": 1}},
+}
+MODULES = [
+    {"name": "Oxygen_Generator", "inputs": {}, "outputs": {"oxygen": 0.5}, "complexity_tier": ["low"]},
+    {"name": "Oxygen_Sink", "inputs": {"oxygen": 2}, "outputs": {}, "complexity_tier": ["low"]},
+]
+AGENTS = [{"name": "robot", "inputs": {}, "outputs": {"labour": 24}}]
+
+
+def _plan(**kwargs):
+    return optimize_robust_loadout(MODULES, ENVIRONMENT, MISSION, AGENTS, n_scenarios=60, seed=3, **kwargs)
+
+
+def test_decomposition_matches_direct_solve_for_full_coverage():
+    direct = _plan(fraction=1.0, decomposition=False)
+    decomposed = _plan(fraction=1.0, decomposition=True)
+    assert decomposed["converged"]
+    assert decomposed["loadout"] == direct["loadout"]
+    assert decomposed["coverage"] == direct["coverage"] == 1.0
+
+
+def test_chance_constraint_is_not_solved_as_full_coverage():
+    full = _plan(fraction=1.0, decomposition=True)
+    decomposed = _plan(fraction=0.8, decomposition=True)
+    direct = _plan(fraction=0.8, decomposition=False)
+    assert decomposed["loadout"] == direct["loadout"]
+    assert decomposed["coverage"] == direct["coverage"] >= 0.8
+    assert sum(direct["loadout"].values()) < sum(full["loadout"].values())